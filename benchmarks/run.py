@@ -0,0 +1,453 @@
+# benchmarks/run.py
+"""
+Benchmarks for the edit-to-preview path, run without a display.
+
+    python3 benchmarks/run.py [--quick] [--only NAME] [--output FILE]
+
+Every case is timed over a number of iterations on synthetic decks (10,
+100 and 1000 slides) and synthetic folder trees (1k to 100k files), all
+generated from a fixed seed. Marp is replaced by the stub in
+benchmarks/stub, which also provides a stub marp-core for the warm
+worker, so runs are offline and measure Presentat rather than Marp.
+
+Highlighting is measured as a full pass of the Markdown tokenizer, the
+work the editor spreads over idle time after opening a deck.
+
+Folder trees are walked, loaded the way the sidebar loads them, and
+searched the way find in files searches them.
+
+The image-path rewriting stage and the converter are measured both cold
+and after a single-slide edit, which is what typing costs.
+
+The report is JSON: p50/p99/max latency per case in milliseconds and the
+peak resident set size of the process (and, for the converter, of its
+Marp worker) while the case ran. Cases that need PyGObject are skipped
+when it is not installed. Save reports from two commits and compare them
+to confirm a performance change.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+STUB_DIR = os.path.join(BENCHMARK_DIR, "stub")
+
+# The stub marp must win the shutil.which() lookup in MarpConverter.
+os.environ["PATH"] = STUB_DIR + os.pathsep + os.environ.get("PATH", "")
+sys.path.insert(0, REPO_DIR)
+
+from src.core.marp_converter import MarpConverter  # noqa: E402
+from src.core.image_paths import ImagePathRewriter  # noqa: E402
+from src.core.markdown_tokens import START, tokenize_line  # noqa: E402
+from src.core.slide_renderer import split_deck  # noqa: E402
+from src.core.walker import walk  # noqa: E402
+
+try:
+    import gi
+    gi.require_version("Gio", "2.0")
+    from gi.repository import Gio, GLib
+except (ImportError, ValueError):
+    Gio = GLib = None
+
+SEED = 20250101
+DECK_SIZES = (10, 100, 1000)
+TREE_SIZES = (1000, 10000, 100000)
+QUICK_TREE_SIZES = (1000, 10000)
+WORDS = (
+    "marp slide deck theme render preview editor folder image asset "
+    "sidebar window layout paginate header footer background color "
+    "latency cache worker buffer stream chunk index search"
+).split()
+
+
+def make_deck(slides: int, rng: random.Random):
+    """Returns a Marp deck with front matter, headings, lists and images."""
+    parts = []
+    for i in range(slides):
+        lines = [f"# Slide {i + 1}: {' '.join(rng.sample(WORDS, 3))}", ""]
+        for _ in range(rng.randint(2, 6)):
+            lines.append("- " + " ".join(rng.choices(WORDS, k=8)))
+        if i % 5 == 0:
+            lines.append("")
+            lines.append(f"![bg right:40%](images/photo-{i % 17}.jpg)")
+        if i % 7 == 0:
+            lines.append("")
+            lines.append(f'<img src="figures/chart-{i % 11}.png" width="300">')
+        if i % 9 == 0:
+            lines.append("")
+            lines.append("<!-- _class: lead -->")
+        parts.append("\n".join(lines))
+    front_matter = "---\nmarp: true\ntheme: default\npaginate: true\n---\n\n"
+    return front_matter + "\n\n---\n\n".join(parts) + "\n"
+
+
+def edit_deck(deck: str, iteration: int):
+    """Changes a single slide, as one keystroke would."""
+    marker = "# Slide 1:"
+    return deck.replace(marker, f"{marker} edit {iteration}", 1)
+
+
+def make_tree(root: str, files: int, rng: random.Random):
+    """Creates a number of Markdown and asset files spread over nested folders."""
+    per_folder = 50
+    folders = max(1, files // per_folder)
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("build/\n*.tmp\n")
+    for folder in range(folders):
+        depth = rng.randint(0, 3)
+        parts = [f"d{(folder >> (4 * level)) % 16}" for level in range(depth)]
+        path = os.path.join(root, *parts, f"f{folder}")
+        os.makedirs(path, exist_ok=True)
+        for index in range(min(per_folder, files - folder * per_folder)):
+            extension = ".md" if index % 3 else ".png"
+            with open(os.path.join(path, f"n{index}{extension}"), "w") as f:
+                f.write("# x\n")
+    os.makedirs(os.path.join(root, "build"), exist_ok=True)
+
+
+class PeakRSS:
+    """
+    Measures the peak RSS of a block, in KiB. On Linux the high-water mark
+    is reset first through /proc/self/clear_refs; elsewhere the result is
+    the peak since the process started.
+    """
+
+    def __enter__(self):
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+        return self
+
+    def __exit__(self, *exc_info):
+        self.kib = _vm_hwm() or resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss
+        return False
+
+
+def _vm_hwm(pid="self"):
+    """Returns the peak RSS of a process in KiB, from /proc on Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def measure(function, iterations: int, setup=None):
+    """Runs function iterations times and returns stats in ms and KiB."""
+    samples = []
+    with PeakRSS() as rss:
+        for iteration in range(iterations):
+            argument = setup(iteration) if setup else None
+            started = time.perf_counter()
+            function(argument)
+            samples.append((time.perf_counter() - started) * 1000.0)
+    samples.sort()
+
+    def pick(fraction):
+        return round(samples[min(int(fraction * len(samples)),
+                                 len(samples) - 1)], 3)
+
+    return {
+        "iterations": iterations,
+        "p50_ms": pick(0.50),
+        "p99_ms": pick(0.99),
+        "max_ms": round(samples[-1], 3),
+        "peak_rss_kib": rss.kib,
+    }
+
+
+def bench_converter(results, decks, iterations):
+    for slides, deck in decks.items():
+        converter = MarpConverter()
+        if not converter.server.available:
+            results[f"convert/worker/{slides}"] = {"skipped": "node not found"}
+        else:
+            # Start the worker outside the timed runs.
+            _expect(converter.convert("# warm up"))
+
+            def cold(iteration):
+                # An empty slide cache: every slide is rendered.
+                converter.slide_renderer.clear()
+                return deck
+
+            results[f"convert/worker-cold/{slides}"] = measure(
+                lambda text: _expect(converter.convert(text)),
+                iterations,
+                cold,
+            )
+            # One slide changed each time: the incremental path.
+            stats = measure(
+                lambda text: _expect(converter.convert(text)),
+                iterations,
+                lambda i: edit_deck(deck, i),
+            )
+            process = converter.server._process
+            stats["worker_peak_rss_kib"] = (
+                _vm_hwm(process.pid) if process else None)
+            results[f"convert/worker-edit/{slides}"] = stats
+        converter.shutdown()
+
+        cli = MarpConverter(use_server=False)
+        results[f"convert/cli/{slides}"] = measure(
+            lambda text: _expect(cli.convert(text)),
+            max(1, iterations // 4),
+            lambda i: edit_deck(deck, i),
+        )
+
+
+def bench_split(results, decks, iterations):
+    for slides, deck in decks.items():
+        results[f"split_deck/{slides}"] = measure(
+            lambda _: split_deck(deck), iterations)
+
+
+def _tokenize_all(lines):
+    state = START
+    for line in lines:
+        _tokens, state = tokenize_line(line, state)
+    return state
+
+
+def bench_highlight(results, decks, iterations):
+    for slides, deck in decks.items():
+        lines = deck.split("\n")
+        results[f"highlight/{slides}"] = measure(
+            lambda _: _tokenize_all(lines), iterations)
+
+
+def bench_image_paths(results, decks, iterations):
+    base_dir = os.path.join(REPO_DIR, "deck")
+    for slides, deck in decks.items():
+        rewriter = ImagePathRewriter()
+
+        def cold(iteration):
+            rewriter.clear()
+            return deck
+
+        results[f"image_paths/cold/{slides}"] = measure(
+            lambda text: rewriter.rewrite(text, base_dir), iterations, cold)
+        results[f"image_paths/edit/{slides}"] = measure(
+            lambda text: rewriter.rewrite(text, base_dir),
+            iterations,
+            lambda i: edit_deck(deck, i),
+        )
+
+
+def bench_file_manager(results, decks, iterations, workdir):
+    if Gio is None:
+        results["file_manager"] = {"skipped": "PyGObject not installed"}
+        return
+    from src.core.file_manager import FileManager
+
+    manager = FileManager()
+    loop = GLib.MainLoop()
+
+    def run_async(start):
+        outcome = []
+
+        def done(*args):
+            outcome.append(args)
+            loop.quit()
+
+        start(done)
+        loop.run()
+        return outcome[0]
+
+    for slides, deck in decks.items():
+        file = Gio.File.new_for_path(
+            os.path.join(workdir, f"deck-{slides}.md"))
+        file.replace_contents(
+            deck.encode("utf-8"), None, False,
+            Gio.FileCreateFlags.NONE, None)
+
+        def load(_):
+            _, result = run_async(
+                lambda done: manager.load_file_async(file, done))
+            _expect(manager.load_file_finish(file, result))
+
+        def save(_):
+            _, result = run_async(
+                lambda done: manager.save_file_async(file, deck, done))
+            _expect(manager.save_file_finish(file, result))
+
+        def load_stream(_):
+            chunks = []
+            success, message = run_async(
+                lambda done: manager.load_file_stream_async(
+                    file, chunks.append, lambda fraction: None, done))
+            _expect((success, message))
+
+        def save_stream(_):
+            _, success, message = run_async(
+                lambda done: manager.save_file_stream_async(
+                    file, [deck], done))
+            _expect((success, message))
+
+        results[f"file_manager/load/{slides}"] = measure(load, iterations)
+        results[f"file_manager/save/{slides}"] = measure(save, iterations)
+        results[f"file_manager/load_stream/{slides}"] = measure(
+            load_stream, iterations)
+        results[f"file_manager/save_stream/{slides}"] = measure(
+            save_stream, iterations)
+
+
+def bench_trees(results, tree_sizes, iterations, workdir, rng):
+    for files in tree_sizes:
+        root = os.path.join(workdir, f"tree-{files}")
+        os.makedirs(root)
+        make_tree(root, files, rng)
+        results[f"walk/{files}"] = measure(
+            lambda _: walk(root), max(1, iterations // 4))
+        if Gio is None:
+            results[f"enumerate/{files}"] = {
+                "skipped": "PyGObject not installed"}
+            results[f"search/{files}"] = {
+                "skipped": "PyGObject not installed"}
+            continue
+        results[f"enumerate/{files}"] = measure(
+            lambda _: _enumerate_all(root), max(1, iterations // 4))
+        results[f"search/{files}"] = measure(
+            lambda _: _search_all(root), max(1, iterations // 4))
+
+
+def _enumerate_all(root: str):
+    """Loads every folder below root the way the sidebar does."""
+    from src.core.directory_tree import DirectoryLoader, FileListItem
+
+    loop = GLib.MainLoop()
+    pending = []
+
+    def expand(item):
+        store = Gio.ListStore.new(FileListItem)
+        loader = DirectoryLoader(item, store)
+        pending.append((loader, store))
+        loader.start()
+
+    def poll():
+        for loader, store in list(pending):
+            if loader.done:
+                pending.remove((loader, store))
+                for position in range(store.get_n_items()):
+                    child = store.get_item(position)
+                    if child.is_dir:
+                        expand(child)
+        if pending:
+            return True
+        loop.quit()
+        return False
+
+    expand(FileListItem(Gio.File.new_for_path(root)))
+    GLib.idle_add(poll)
+    loop.run()
+
+
+def _search_all(root: str):
+    """Runs a find in files over root until every file was searched."""
+    from src.core.workspace_search import (
+        SearchMatch, WorkspaceSearch, compile_query)
+
+    loop = GLib.MainLoop()
+    search = WorkspaceSearch(Gio.ListStore.new(SearchMatch))
+    search.start(root, compile_query("x"), lambda truncated: loop.quit())
+    loop.run()
+
+
+def _expect(outcome):
+    success, result = outcome
+    if not success:
+        raise RuntimeError(f"benchmark operation failed: {result}")
+    return result
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "-C", REPO_DIR, "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+CASES = ("convert", "split_deck", "highlight", "image_paths", "file_manager",
+         "trees")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the edit-to-preview path without a display.")
+    parser.add_argument(
+        "--iterations", type=int, default=40,
+        help="timed runs per case (default: 40)")
+    parser.add_argument(
+        "--quick", action="store_true",
+        help="fewer iterations and no 100k-file tree")
+    parser.add_argument(
+        "--only", choices=CASES, action="append",
+        help="run only this group of cases (repeatable)")
+    parser.add_argument(
+        "--output", metavar="FILE",
+        help="write the JSON report to FILE instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    iterations = 10 if args.quick else args.iterations
+    tree_sizes = QUICK_TREE_SIZES if args.quick else TREE_SIZES
+    groups = set(args.only or CASES)
+    rng = random.Random(SEED)
+    decks = {slides: make_deck(slides, rng) for slides in DECK_SIZES}
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="presentat-bench-")
+    try:
+        if "split_deck" in groups:
+            bench_split(results, decks, iterations)
+        if "highlight" in groups:
+            bench_highlight(results, decks, iterations)
+        if "image_paths" in groups:
+            bench_image_paths(results, decks, iterations)
+        if "convert" in groups:
+            bench_converter(results, decks, iterations)
+        if "file_manager" in groups:
+            bench_file_manager(results, decks, iterations, workdir)
+        if "trees" in groups:
+            bench_trees(results, tree_sizes, iterations, workdir, rng)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": SEED,
+        "iterations": iterations,
+        "results": results,
+    }
+    data = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,95 @@
+# src/core/adaptive_debounce.py
+import time
+
+from gi.repository import GLib
+
+# Bounds of the delay between the last edit and the next render.
+MIN_DELAY_MS = 20
+MAX_DELAY_MS = 1500
+# In idle-only mode, render only after a pause in typing this long.
+IDLE_ONLY_DELAY_MS = 2000
+# Gaps between edits longer than this are pauses, not typing cadence.
+MAX_CADENCE = 1.0
+# A pause counts as the end of a burst once it is this many typical
+# keystroke gaps long.
+PAUSE_FACTOR = 1.5
+# Weight of the newest sample in the running averages.
+SMOOTHING = 0.3
+
+
+class AdaptiveDebounce:
+    """
+    Decides when an edited buffer should be rendered.
+
+    Keeps running averages of how long conversions take and of the gap
+    between edits. When a render costs well under the typing cadence the
+    preview follows the typing; otherwise it waits for a pause in typing
+    that lasts longer than a typical keystroke gap. A render that comes
+    due while the previous one is still running waits for it instead of
+    queueing conversions back to back.
+    """
+
+    def __init__(self, scheduler, submit):
+        self.scheduler = scheduler
+        # Called to hand the current buffer to the scheduler.
+        self.submit = submit
+        self.idle_only = False
+        self.render_cost = 0.1
+        self.cadence = 0.2
+        self._last_edit = None
+        self._timeout_id = None
+        self._waiting = False
+
+    def delay_ms(self):
+        """Returns the delay to use after an edit, in milliseconds."""
+        if self.idle_only:
+            return IDLE_ONLY_DELAY_MS
+        if 2 * self.render_cost <= self.cadence:
+            # Cheap enough to render between keystrokes.
+            delay = 2 * self.render_cost
+        else:
+            delay = max(PAUSE_FACTOR * self.cadence, self.render_cost)
+        return int(min(max(delay * 1000, MIN_DELAY_MS), MAX_DELAY_MS))
+
+    def edited(self):
+        """Notes an edit and (re)arms the render timer."""
+        now = time.monotonic()
+        if self._last_edit is not None and now - self._last_edit < MAX_CADENCE:
+            self.cadence += SMOOTHING * (now - self._last_edit - self.cadence)
+        self._last_edit = now
+        self._cancel_timeout()
+        self._timeout_id = GLib.timeout_add(self.delay_ms(), self._on_timeout)
+
+    def render_now(self):
+        """Renders immediately, skipping any pending delay."""
+        self._cancel_timeout()
+        self._waiting = False
+        self.submit()
+
+    def rendered(self, seconds):
+        """
+        Notes how long the last conversion took, and starts a render that
+        was held back while it ran.
+        """
+        if seconds is not None:
+            self.render_cost += SMOOTHING * (seconds - self.render_cost)
+        if self._waiting:
+            self._waiting = False
+            self.submit()
+
+    def cancel(self):
+        self._cancel_timeout()
+        self._waiting = False
+
+    def _cancel_timeout(self):
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+
+    def _on_timeout(self):
+        self._timeout_id = None
+        if self.scheduler.busy:
+            self._waiting = True
+        else:
+            self.submit()
+        return False
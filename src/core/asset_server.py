@@ -0,0 +1,199 @@
+# src/core/asset_server.py
+import hashlib
+import os
+from collections import OrderedDict
+from urllib.parse import unquote
+
+from gi.repository import Gio, GLib, WebKit
+
+from .image_paths import ASSET_PREFIX
+
+ASSET_ATTRIBUTES = "standard::content-type,standard::size,time::modified"
+
+
+class AssetServer:
+    """
+    Serves local files for marp://asset/<scope>/<relative path> URIs.
+
+    A page loaded with base_uri(folder) as its base resolves the relative
+    image paths of its deck to such URIs. A scope stands for a deck's
+    folder and, optionally, the workspace folder; only files whose real
+    path is inside one of those are served, anything else is answered
+    with 403 Forbidden. Scopes are counted per base_uri() call and served
+    until as many release() calls drop them. Small files are kept in a size-bounded LRU and
+    revalidated against their modification time.
+
+    With an ImageProxy, large raster images are answered with a copy
+    downscaled to image_size pixels, which the previewer keeps in step
+    with its width; until it is set, originals are served.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_item_bytes=8 * 1024 * 1024,
+                 image_proxy=None):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.image_proxy = image_proxy
+        self.image_size = None
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        # scope -> real paths of the folders it may serve from, the deck's
+        # folder first.
+        self._scopes = {}
+        # scope -> number of base_uri() calls not released yet.
+        self._references = {}
+
+    def base_uri(self, folder: Gio.File, workspace: Gio.File = None):
+        """
+        Returns the base URI for pages whose relative asset paths resolve
+        against folder, which may also read files below workspace; or None
+        if folder is not a local folder. Pass it to release() once no page
+        uses it.
+        """
+        path = folder.get_path() if folder is not None else None
+        if path is None:
+            return None
+        roots = [os.path.realpath(path)]
+        workspace_path = workspace.get_path() if workspace is not None else None
+        if workspace_path is not None:
+            roots.append(os.path.realpath(workspace_path))
+        scope = hashlib.blake2b(
+            "\0".join(roots).encode("utf-8"), digest_size=8).hexdigest()
+        self._scopes[scope] = tuple(roots)
+        self._references[scope] = self._references.get(scope, 0) + 1
+        return f"{ASSET_PREFIX}/{scope}/"
+
+    def release(self, base_uri: str):
+        """Stops serving a base_uri() scope once nothing else uses it."""
+        if base_uri is None or not self.handles(base_uri):
+            return
+        scope = base_uri[len(ASSET_PREFIX) + 1:].rstrip("/")
+        count = self._references.get(scope, 0) - 1
+        if count > 0:
+            self._references[scope] = count
+        else:
+            self._references.pop(scope, None)
+            self._scopes.pop(scope, None)
+
+    def handles(self, uri: str):
+        return uri.startswith(ASSET_PREFIX + "/")
+
+    def _resolve(self, uri: str):
+        """Returns the real path a URI is allowed to serve, or None."""
+        rest = uri[len(ASSET_PREFIX) + 1:].split("#", 1)[0].split("?", 1)[0]
+        scope, _slash, relative = rest.partition("/")
+        roots = self._scopes.get(scope)
+        if roots is None or not relative:
+            return None
+        path = os.path.realpath(os.path.join(roots[0], unquote(relative)))
+        for root in roots:
+            if os.path.commonpath((root, path)) == root:
+                return path
+        return None
+
+    def serve(self, request: WebKit.URISchemeRequest):
+        """Answers a marp://asset request asynchronously."""
+        path = self._resolve(request.get_uri())
+        if path is None:
+            response = WebKit.URISchemeResponse.new(
+                Gio.MemoryInputStream.new(), 0)
+            response.set_status(403, "Forbidden")
+            request.finish_with_response(response)
+            return
+        file = Gio.File.new_for_path(path)
+        file.query_info_async(
+            ASSET_ATTRIBUTES,
+            Gio.FileQueryInfoFlags.NONE,
+            GLib.PRIORITY_DEFAULT,
+            None,
+            self._on_info_ready,
+            request,
+        )
+
+    def _on_info_ready(self, file: Gio.File, result, request):
+        try:
+            info = file.query_info_finish(result)
+        except GLib.Error as e:
+            request.finish_error(e)
+            return
+
+        path = file.get_path()
+        mtime = info.get_modification_date_time()
+        mtime = mtime.to_unix_usec() if mtime else 0
+        content_type = info.get_content_type() or "application/octet-stream"
+        mime_type = (
+            Gio.content_type_get_mime_type(content_type)
+            or "application/octet-stream"
+        )
+        size = info.get_size()
+
+        proxy = self.image_proxy
+        if proxy is not None and self.image_size and proxy.handles(mime_type):
+            def on_proxy_ready(found):
+                if found is None:
+                    self._send(request, path, mtime, size, mime_type)
+                else:
+                    # Proxies are named after their source and never change.
+                    proxy_path, proxy_size, proxy_type = found
+                    self._send(request, proxy_path, 0, proxy_size, proxy_type)
+
+            proxy.lookup(path, mtime, size, self.image_size, on_proxy_ready)
+            return
+        self._send(request, path, mtime, size, mime_type)
+
+    def _send(self, request, key, mtime, size, mime_type):
+        cached = self._cache.get(key)
+        if cached and cached[0] == mtime:
+            self._cache.move_to_end(key)
+            self._finish_with_bytes(request, cached[2], cached[1])
+            return
+
+        file = Gio.File.new_for_path(key)
+        if size > self.max_item_bytes:
+            # Too large to cache; stream it straight from disk.
+            file.read_async(
+                GLib.PRIORITY_DEFAULT,
+                None,
+                self._on_stream_ready,
+                (request, size, mime_type),
+            )
+            return
+
+        file.load_bytes_async(
+            None, self._on_bytes_ready, (request, key, mtime, mime_type))
+
+    def _on_stream_ready(self, file: Gio.File, result, data):
+        request, size, mime_type = data
+        try:
+            stream = file.read_finish(result)
+        except GLib.Error as e:
+            request.finish_error(e)
+            return
+        request.finish(stream, size, mime_type)
+
+    def _on_bytes_ready(self, file: Gio.File, result, data):
+        request, key, mtime, mime_type = data
+        try:
+            contents, _etag = file.load_bytes_finish(result)
+        except GLib.Error as e:
+            request.finish_error(e)
+            return
+        self._store(key, mtime, mime_type, contents)
+        self._finish_with_bytes(request, contents, mime_type)
+
+    def _finish_with_bytes(self, request, contents: GLib.Bytes, mime_type):
+        stream = Gio.MemoryInputStream.new_from_bytes(contents)
+        request.finish(stream, contents.get_size(), mime_type)
+
+    def _store(self, key, mtime, mime_type, contents: GLib.Bytes):
+        old = self._cache.pop(key, None)
+        if old:
+            self._cached_bytes -= old[2].get_size()
+        self._cache[key] = (mtime, mime_type, contents)
+        self._cached_bytes += contents.get_size()
+        while self._cached_bytes > self.max_bytes and self._cache:
+            _key, (_mtime, _mime, evicted) = self._cache.popitem(last=False)
+            self._cached_bytes -= evicted.get_size()
+
+    def clear(self):
+        self._cache.clear()
+        self._cached_bytes = 0
@@ -0,0 +1,83 @@
+# src/core/conversion_scheduler.py
+import threading
+import time
+
+from gi.repository import GLib
+
+from .metrics import preview_metrics
+
+
+class ConversionScheduler:
+    """
+    Runs Marp conversions on a background thread with at most one job
+    running and one pending.
+
+    Every submission gets a new generation number. A newer submission
+    replaces the pending job and cancels the running one, and results
+    from superseded generations are dropped so the last edit always wins.
+    """
+
+    def __init__(self, converter, callback):
+        self.converter = converter
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending = None
+        self._running = False
+        self._delivered = 0
+        # Seconds taken by the conversion behind the last delivered result.
+        self.last_duration = None
+
+    @property
+    def generation(self):
+        return self._generation
+
+    @property
+    def busy(self):
+        """Whether the result of the latest submission is still to come."""
+        return self._delivered != self._generation
+
+    def submit(self, markdown_content: str, base_dir=None):
+        """
+        Queues markdown content for conversion and returns its generation.
+        base_dir is the folder its relative image paths resolve against.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._pending = (generation, markdown_content, base_dir)
+            if self._running:
+                # Whatever is running now is stale.
+                self.converter.cancel()
+                return generation
+            self._running = True
+
+        threading.Thread(target=self._worker, daemon=True).start()
+        return generation
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                if self._pending is None:
+                    self._running = False
+                    return
+                generation, markdown_content, base_dir = self._pending
+                self._pending = None
+
+            started = time.monotonic()
+            success, result = self.converter.convert(
+                markdown_content, base_dir)
+            finished = time.monotonic()
+            if generation == self._generation:
+                GLib.idle_add(
+                    self._deliver, generation, success, result,
+                    finished - started, finished)
+
+    def _deliver(self, generation, success, result, duration, queued_at):
+        """Hands a result to the callback on the main loop, unless stale."""
+        preview_metrics.record("handoff", time.monotonic() - queued_at)
+        if generation == self._generation:
+            self._delivered = generation
+            self.last_duration = duration
+            self.callback(success, result)
+        return False
@@ -1,32 +1,296 @@
 from gi.repository import Gio, Gtk, GLib, GObject
 
+# Everything the sidebar needs from a child, fetched in a single query.
+ENUMERATE_ATTRIBUTES = (
+    "standard::name,standard::type,standard::display-name,standard::icon"
+)
+# Number of children requested from the enumerator per round trip.
+BATCH_SIZE = 200
+# Delay used to fold bursts of file monitor events into a single update.
+MONITOR_DEBOUNCE_MS = 200
+
+
+# Icons are shared between items so large trees hold one Gio.Icon per kind.
+_icons = {}
+
+
+def _shared_icon(info: Gio.FileInfo, is_dir: bool):
+    if is_dir:
+        name = "folder-symbolic"
+    else:
+        icon = info.get_icon() if info.has_attribute("standard::icon") else None
+        name = icon.to_string() if icon else "text-x-generic-symbolic"
+    icon = _icons.get(name)
+    if icon is None:
+        icon = _icons[name] = Gio.Icon.new_for_string(name)
+    return icon
+
+
 class FileListItem(GObject.Object):
-    def __init__(self, file: Gio.File, **kwargs):
+    """
+    A sidebar entry. Everything needed to display it is read once from the
+    enumeration Gio.FileInfo, so binding a row does no I/O. Children keep
+    their parent and name instead of a Gio.File of their own.
+    """
+
+    def __init__(self, file: Gio.File = None, info: Gio.FileInfo = None,
+                 parent=None, **kwargs):
         super().__init__(**kwargs)
-        self.file = file
-        self.is_dir = file.query_file_type(Gio.FileQueryInfoFlags.NONE, None) == Gio.FileType.DIRECTORY
-        file_info = file.query_info("standard::display-name", Gio.FileQueryInfoFlags.NONE, None)
-        self.display_name = file_info.get_display_name() if file_info else ""
-
-def create_child_model_func(item):
-    parent_item = item
-    if not parent_item or not parent_item.is_dir:
-        return None
-
-    child_list_store = Gio.ListStore.new(FileListItem)
-    try:
-        enumerator = parent_item.file.enumerate_children(
-            "standard::name,standard::type",
+        if info is None:
+            info = file.query_info(
+                ENUMERATE_ATTRIBUTES, Gio.FileQueryInfoFlags.NONE, None)
+        self._file = file
+        self.parent = parent
+        self.name = info.get_name()
+        self.is_dir = info.get_file_type() == Gio.FileType.DIRECTORY
+        self.display_name = info.get_display_name() or ""
+        self.icon = _shared_icon(info, self.is_dir)
+
+    @property
+    def file(self):
+        if self._file is None:
+            return self.parent.file.get_child(self.name)
+        return self._file
+
+
+class DirectoryLoader:
+    """
+    Fills a Gio.ListStore with the children of a folder without blocking
+    the main loop. Children are enumerated asynchronously in batches and
+    spliced into the store as each batch arrives.
+    """
+
+    def __init__(self, parent_item: FileListItem, store: Gio.ListStore):
+        self.parent_item = parent_item
+        self.folder = parent_item.file
+        self.store = store
+        self.cancellable = Gio.Cancellable()
+        self.done = False
+
+    def start(self):
+        self.folder.enumerate_children_async(
+            ENUMERATE_ATTRIBUTES,
             Gio.FileQueryInfoFlags.NONE,
-            None
+            GLib.PRIORITY_DEFAULT,
+            self.cancellable,
+            self._on_enumerator_ready,
+        )
+
+    def cancel(self):
+        self.cancellable.cancel()
+
+    def _on_enumerator_ready(self, folder: Gio.File, result):
+        try:
+            enumerator = folder.enumerate_children_finish(result)
+        except GLib.Error as e:
+            if not e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                print(f"Error reading directory: {e.message}")
+            self.done = True
+            return
+        self._next_batch(enumerator)
+
+    def _next_batch(self, enumerator: Gio.FileEnumerator):
+        enumerator.next_files_async(
+            BATCH_SIZE,
+            GLib.PRIORITY_DEFAULT,
+            self.cancellable,
+            self._on_batch_ready,
         )
-        while True:
-            file_info = enumerator.next_file(None)
-            if not file_info:
-                break
-            child_file = parent_item.file.get_child(file_info.get_name())
-            child_list_store.append(FileListItem(file=child_file))
-    except GLib.Error as e:
-        print(f"Error reading directory: {e.message}")
-        pass
-    return child_list_store
+
+    def _on_batch_ready(self, enumerator: Gio.FileEnumerator, result):
+        try:
+            infos = enumerator.next_files_finish(result)
+        except GLib.Error as e:
+            if not e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                print(f"Error reading directory: {e.message}")
+            enumerator.close_async(GLib.PRIORITY_DEFAULT, None, None)
+            self.done = True
+            return
+
+        if not infos:
+            enumerator.close_async(GLib.PRIORITY_DEFAULT, None, None)
+            self.done = True
+            return
+
+        items = [
+            FileListItem(info=info, parent=self.parent_item)
+            for info in infos
+        ]
+        self.store.splice(self.store.get_n_items(), 0, items)
+        self._next_batch(enumerator)
+
+
+class DirectoryWatcher:
+    """
+    Loads an expanded folder and keeps its Gio.ListStore in sync with a
+    Gio.FileMonitor. Monitor events are collected and applied as one batch
+    of removals and appends after a short debounce. New entries go at the
+    end, like those DirectoryLoader adds in enumeration order.
+    """
+
+    def __init__(self, parent_item: FileListItem, store: Gio.ListStore,
+                 monitors):
+        self.parent_item = parent_item
+        self.store = store
+        self.monitors = monitors
+        self.loader = DirectoryLoader(parent_item, store)
+        # name -> True to add, False to remove; the last event wins.
+        self._changes = {}
+        self._flush_id = None
+        try:
+            self.monitor = parent_item.file.monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None)
+            self.monitor.connect("changed", self._on_changed)
+        except GLib.Error as e:
+            print(f"Unable to watch directory: {e.message}")
+            self.monitor = None
+
+    def start(self):
+        self.loader.start()
+
+    def stop(self):
+        self.loader.cancel()
+        if self.monitor is not None:
+            self.monitor.cancel()
+            self.monitor = None
+        if self._flush_id is not None:
+            GLib.source_remove(self._flush_id)
+            self._flush_id = None
+
+    def _on_changed(self, monitor, file, other_file, event_type):
+        if event_type in (
+            Gio.FileMonitorEvent.CREATED,
+            Gio.FileMonitorEvent.MOVED_IN,
+        ):
+            self._changes[file.get_basename()] = True
+        elif event_type in (
+            Gio.FileMonitorEvent.DELETED,
+            Gio.FileMonitorEvent.MOVED_OUT,
+        ):
+            self._changes[file.get_basename()] = False
+        elif event_type == Gio.FileMonitorEvent.RENAMED:
+            self._changes[file.get_basename()] = False
+            self._changes[other_file.get_basename()] = True
+        else:
+            return
+        if self._flush_id is None:
+            self._flush_id = GLib.timeout_add(
+                MONITOR_DEBOUNCE_MS, self._flush)
+
+    def _flush(self):
+        if not self.loader.done:
+            # Let the initial enumeration finish first; retry later.
+            return True
+        self._flush_id = None
+        changes, self._changes = self._changes, {}
+
+        positions = {}
+        for position in range(self.store.get_n_items()):
+            positions[self.store.get_item(position).name] = position
+
+        # Entries that are still there (e.g. after an atomic save, which
+        # deletes and recreates the file) keep their row, so expanded
+        # folders stay expanded.
+        removed = sorted(
+            (positions[name] for name, add in changes.items()
+             if not add and name in positions),
+            reverse=True,
+        )
+        for position in removed:
+            item = self.store.get_item(position)
+            if item.is_dir:
+                self.monitors.stop(item)
+            self.store.remove(position)
+
+        added = [
+            name for name, add in changes.items()
+            if add and name not in positions
+        ]
+        if added:
+            self._query_added(added)
+        return False
+
+    def _query_added(self, names):
+        infos = []
+        pending = [len(names)]
+
+        def on_info_ready(file, result):
+            try:
+                infos.append(file.query_info_finish(result))
+            except GLib.Error:
+                # Gone again before we could look at it.
+                pass
+            pending[0] -= 1
+            if pending[0] == 0 and self.monitor is not None:
+                self._append(infos)
+
+        for name in names:
+            self.parent_item.file.get_child(name).query_info_async(
+                ENUMERATE_ATTRIBUTES,
+                Gio.FileQueryInfoFlags.NONE,
+                GLib.PRIORITY_DEFAULT,
+                None,
+                on_info_ready,
+            )
+
+    def _append(self, infos):
+        present = {
+            self.store.get_item(position).name
+            for position in range(self.store.get_n_items())
+        }
+        items = [
+            FileListItem(info=info, parent=self.parent_item)
+            for info in infos
+            if info.get_name() not in present
+        ]
+        if items:
+            self.store.splice(self.store.get_n_items(), 0, items)
+
+
+class DirectoryMonitors:
+    """
+    Owns one DirectoryWatcher per expanded folder. Watchers are created with
+    the child model of an expanded row and stopped when the row (or one of
+    its ancestors) collapses, so the number of monitors follows the number
+    of expanded rows rather than the size of the tree.
+    """
+
+    def __init__(self):
+        self._watchers = {}
+
+    def create_child_model(self, item):
+        if not item or not item.is_dir:
+            return None
+
+        self.stop(item)
+        child_list_store = Gio.ListStore.new(FileListItem)
+        watcher = DirectoryWatcher(item, child_list_store, self)
+        self._watchers[item] = watcher
+        watcher.start()
+        return child_list_store
+
+    def track_row(self, row: Gtk.TreeListRow):
+        """Stops watching a row's folder once the row is collapsed."""
+        item = row.get_item()
+        if getattr(item, "tracks_expansion", False):
+            return
+        item.tracks_expansion = True
+        row.connect("notify::expanded", self._on_row_expanded_changed)
+
+    def _on_row_expanded_changed(self, row: Gtk.TreeListRow, pspec):
+        if not row.get_expanded():
+            self.stop(row.get_item())
+
+    def stop(self, item):
+        """Stops the watchers of item and of every folder below it."""
+        for watched in list(self._watchers):
+            ancestor = watched
+            while ancestor is not None and ancestor is not item:
+                ancestor = ancestor.parent
+            if ancestor is item:
+                self._watchers.pop(watched).stop()
+
+    def stop_all(self):
+        for watcher in self._watchers.values():
+            watcher.stop()
+        self._watchers.clear()
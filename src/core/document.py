@@ -0,0 +1,61 @@
+# src/core/document.py
+from gi.repository import Gtk
+
+from .highlighter import MarkdownHighlighter
+from .slide_index import SlideIndex
+
+
+class Document:
+    """
+    One open deck: its file, its own Gtk.TextBuffer (and with it its undo
+    history) and the last deck rendered from it. Preview views are lent
+    by a PreviewPool and may be taken back while the document is in the
+    background, so the rendered deck is kept here to restore them without
+    converting again.
+    """
+
+    def __init__(self, file=None):
+        self.file = file
+        self.buffer = Gtk.TextBuffer()
+        self.highlighter = MarkdownHighlighter(self.buffer)
+        self.page = None
+        self.view = None
+        self.deck = None
+        self.slide_index = SlideIndex()
+        # The EditJournal keeping its unsaved edits, set by the window.
+        self.journal = None
+        self.loading = False
+        self.saving = False
+        # Whether the buffer changed since its last render was submitted.
+        self.stale = True
+
+    @property
+    def title(self):
+        return self.file.get_basename() if self.file else "Untitled"
+
+    @property
+    def editable(self):
+        # Streaming loads and saves need the buffer to hold still.
+        return not self.loading and not self.saving
+
+    @property
+    def is_blank(self):
+        """Whether the document is an untouched, untitled buffer."""
+        return (
+            self.file is None
+            and not self.loading
+            and self.buffer.get_char_count() == 0
+        )
+
+    @property
+    def unsaved(self):
+        """Whether closing the document would lose edits."""
+        return (
+            self.buffer.get_modified()
+            and not self.loading
+            and not self.is_blank
+        )
+
+    def get_text(self):
+        return self.buffer.get_text(
+            self.buffer.get_start_iter(), self.buffer.get_end_iter(), False)
@@ -0,0 +1,377 @@
+# src/core/edit_journal.py
+import json
+import os
+import threading
+import time
+import uuid
+
+from gi.repository import GLib
+
+JOURNAL_VERSION = 1
+# Edits are written and fsync'd at most this often.
+FLUSH_INTERVAL = 0.5
+# A journal is folded into a snapshot once its log grows past this size
+# or this many records, which also bounds the work of replaying it.
+COMPACT_BYTES = 1024 * 1024
+COMPACT_RECORDS = 1000
+
+
+def journal_directory():
+    return os.path.join(GLib.get_user_state_dir(), "presentat", "journal")
+
+
+class EditJournal:
+    """
+    The unsaved edits of one document, kept on disk so they survive a
+    crash.
+
+    Every insertion and deletion is appended to a log as a small JSON
+    record, so the cost of journaling follows the size of the edit, not
+    of the document. The log replays on top of a base: the file the
+    document was loaded from or last saved to (identified by its size and
+    modification time), an empty buffer, or a snapshot of the text. Once
+    the log passes COMPACT_BYTES, the current text becomes the new
+    snapshot and a new log is started.
+
+    Records are queued on the main loop and written by a JournalWriter
+    thread. reset() drops the journal once the buffer matches its file
+    again, e.g. after saving.
+    """
+
+    def __init__(self, writer, path=None, journal_id=None, generation=0):
+        self.writer = writer
+        self.path = path
+        self.id = journal_id or uuid.uuid4().hex
+        self.generation = generation
+        self.log_bytes = 0
+        self.log_records = 0
+        # Whether the journal has files on disk.
+        self.started = journal_id is not None
+        self._last_insert = None
+
+    def inserted(self, offset: int, text: str):
+        last = self._last_insert
+        if (last is not None and last[0] + last[1] == offset
+                and self.writer.extend(self, text)):
+            # Typing: the previous record, still unwritten, was extended.
+            last[1] += len(text)
+        else:
+            self._record({"i": offset, "t": text})
+            self._last_insert = [offset, len(text)]
+
+    def deleted(self, start: int, end: int):
+        if end > start:
+            self._record({"d": [start, end]})
+
+    def _record(self, record):
+        self._last_insert = None
+        if not self.started:
+            self.started = True
+            self.writer.write_header(self, self._header(None))
+        self.log_records += 1
+        self.writer.append(self, record)
+
+    def maybe_compact(self, get_text):
+        """Snapshots get_text() if the log has grown too long."""
+        if (self.log_bytes < COMPACT_BYTES
+                and self.log_records < COMPACT_RECORDS):
+            return
+        self.generation += 1
+        self.log_bytes = 0
+        self.log_records = 0
+        self._last_insert = None
+        self.writer.write_header(self, self._header(get_text()))
+
+    def reset(self, path=None):
+        """Drops the journal; the buffer now matches the file at path."""
+        self.path = path
+        self._last_insert = None
+        self.log_bytes = 0
+        self.log_records = 0
+        if self.started:
+            self.started = False
+            self.writer.discard(self)
+            self.generation += 1
+
+    def _header(self, text):
+        header = {
+            "version": JOURNAL_VERSION,
+            "generation": self.generation,
+            "pid": os.getpid(),
+            "path": self.path,
+            "time": time.time(),
+        }
+        if text is not None:
+            header["base"] = "text"
+            header["text"] = text
+        elif self.path is not None:
+            # Size and mtime of the base file are filled in by the writer.
+            header["base"] = "file"
+        else:
+            header["base"] = "empty"
+        return header
+
+
+class JournalWriter:
+    """
+    Writes EditJournals on a background thread.
+
+    Work is queued in order from the main loop and written in batches
+    every FLUSH_INTERVAL: log records are appended and fsync'd once per
+    batch, headers (and snapshots) are written to a temporary file and
+    renamed into place, after which the previous generation's log is
+    deleted.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or journal_directory()
+        self._jobs = []
+        self._condition = threading.Condition()
+        # Held while writing, so flush() and the thread take turns.
+        self._write_lock = threading.Lock()
+        self._logs = {}
+        self._stopped = False
+        self._thread = None
+
+    def header_file(self, journal_id):
+        return os.path.join(self.directory, f"{journal_id}.json")
+
+    def log_file(self, journal_id, generation):
+        return os.path.join(self.directory, f"{journal_id}.{generation}.log")
+
+    def write_header(self, journal, header):
+        self._queue(("header", journal.id, header))
+
+    def append(self, journal, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        journal.log_bytes += len(line)
+        with self._condition:
+            job = self._last_append(journal)
+            if job is not None:
+                job[3].append(line)
+                return
+        self._queue(["append", journal.id, journal.generation, [line]])
+
+    def extend(self, journal, text):
+        """
+        Adds text to the journal's last record, an insertion, unless it
+        was already written. Returns whether it did.
+        """
+        encoded = json.dumps(text, ensure_ascii=False)[1:-1]
+        with self._condition:
+            job = self._last_append(journal)
+            if job is None:
+                return False
+            # Insertions end in '"}\n'; splice the text in before that.
+            last = job[3][-1]
+            job[3][-1] = last[:-3] + encoded + last[-3:]
+        journal.log_bytes += len(encoded)
+        return True
+
+    def _last_append(self, journal):
+        """Returns the queued append job of journal if it is the last job."""
+        job = self._jobs[-1] if self._jobs else None
+        if (job is not None and job[0] == "append" and job[1] == journal.id
+                and job[2] == journal.generation):
+            return job
+        return None
+
+    def discard(self, journal):
+        self._queue(("discard", journal.id, None))
+
+    def flush(self):
+        """Writes everything queued, blocking; used when closing."""
+        with self._write_lock:
+            with self._condition:
+                jobs, self._jobs = self._jobs, []
+            self._run(jobs)
+
+    def stop(self):
+        self.flush()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        with self._write_lock:
+            for _generation, log in self._logs.values():
+                log.close()
+            self._logs.clear()
+
+    def _queue(self, job):
+        with self._condition:
+            self._jobs.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while not self._jobs and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+            # Let a burst of edits pile up into a single write.
+            time.sleep(FLUSH_INTERVAL)
+            with self._write_lock:
+                with self._condition:
+                    jobs, self._jobs = self._jobs, []
+                self._run(jobs)
+
+    def _run(self, jobs):
+        touched = set()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            print(f"Unable to write edit journal: {e}")
+            return
+        for job in jobs:
+            kind, journal_id = job[0], job[1]
+            try:
+                if kind == "append":
+                    log = self._open_log(journal_id, job[2])
+                    log.writelines(job[3])
+                    touched.add(log)
+                elif kind == "header":
+                    self._write_header(journal_id, job[2])
+                else:
+                    self._remove(journal_id)
+            except OSError as e:
+                print(f"Unable to write edit journal: {e}")
+        for log in touched:
+            if log.closed:
+                continue  # Superseded by a snapshot in this batch.
+            try:
+                log.flush()
+                os.fsync(log.fileno())
+            except (OSError, ValueError) as e:
+                print(f"Unable to write edit journal: {e}")
+
+    def _open_log(self, journal_id, generation):
+        current = self._logs.get(journal_id)
+        if current is not None and current[0] == generation:
+            return current[1]
+        if current is not None:
+            current[1].close()
+        log = open(self.log_file(journal_id, generation), "a",
+                   encoding="utf-8")
+        self._logs[journal_id] = (generation, log)
+        return log
+
+    def _write_header(self, journal_id, header):
+        if header["base"] == "file":
+            stat = os.stat(header["path"])
+            header["size"] = stat.st_size
+            header["mtime"] = stat.st_mtime_ns
+        file_name = self.header_file(journal_id)
+        tmp_name = file_name + ".tmp"
+        with open(tmp_name, "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, file_name)
+        # Earlier generations are covered by the new header.
+        self._remove_logs(journal_id, keep=header["generation"])
+
+    def _remove(self, journal_id):
+        self._remove_logs(journal_id)
+        try:
+            os.remove(self.header_file(journal_id))
+        except FileNotFoundError:
+            pass
+
+    def _remove_logs(self, journal_id, keep=None):
+        current = self._logs.get(journal_id)
+        if current is not None and current[0] != keep:
+            current[1].close()
+            del self._logs[journal_id]
+        prefix = journal_id + "."
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if (entry.name.startswith(prefix)
+                        and entry.name.endswith(".log")
+                        and entry.name != f"{journal_id}.{keep}.log"):
+                    os.remove(entry.path)
+
+
+def recover_journals(directory=None):
+    """
+    Returns [(journal_id, path, generation, text)] for the journals left
+    behind by Presentat processes that are no longer running, with text
+    rebuilt from each journal's base and log. Journals that cannot be
+    replayed, e.g. because their base file changed, are skipped.
+    This is a synchronous (blocking) function.
+    """
+    directory = directory or journal_directory()
+    recovered = []
+    try:
+        entries = [entry.name for entry in os.scandir(directory)]
+    except OSError:
+        return recovered
+    for name in entries:
+        if not name.endswith(".json"):
+            continue
+        journal_id = name[:-len(".json")]
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                header = json.load(f)
+            if (header.get("version") != JOURNAL_VERSION
+                    or _is_running(header.get("pid"))):
+                continue
+            text = _replay(directory, journal_id, header)
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            print(f"Unable to recover edit journal {journal_id}: {e}")
+            continue
+        if text is not None:
+            recovered.append(
+                (journal_id, header["path"], header["generation"], text))
+    return recovered
+
+
+def _is_running(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
+
+
+def _replay(directory, journal_id, header):
+    base = header["base"]
+    if base == "text":
+        text = header["text"]
+    elif base == "file":
+        stat = os.stat(header["path"])
+        if (stat.st_size, stat.st_mtime_ns) != (header["size"],
+                                                header["mtime"]):
+            print(f"Not recovering edits to {header['path']}: "
+                  "the file changed since they were made")
+            return None
+        # Offsets count "\r" as the editor does, so keep line endings as is.
+        with open(header["path"], encoding="utf-8", newline="") as f:
+            text = f.read()
+    else:
+        text = ""
+
+    log_name = os.path.join(
+        directory, f"{journal_id}.{header['generation']}.log")
+    try:
+        with open(log_name, encoding="utf-8") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        lines = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            break  # A record cut short by the crash.
+        if "i" in record:
+            offset = record["i"]
+            text = text[:offset] + record["t"] + text[offset:]
+        else:
+            start, end = record["d"]
+            text = text[:start] + text[end:]
+    return text
@@ -0,0 +1,336 @@
+# src/core/file_index.py
+import bisect
+import os
+import re
+import threading
+import time
+
+from gi.repository import Gio, GLib
+
+from .walker import ALWAYS_IGNORED, MARKDOWN_EXTENSIONS, is_ignored, walk
+
+# inotify watches are a limited, per-user resource.
+MAX_MONITORS = 2000
+RESULT_LIMIT = 50
+# Candidates collected before ranking; keeps short queries fast.
+MAX_CANDIDATES = 400
+# Time after which a search stops scanning and ranks what it has found.
+SEARCH_BUDGET = 0.008
+
+
+class FileIndex:
+    """
+    An in-memory index of the Markdown files below a folder, for quick open.
+
+    The folder is walked on a background thread (honouring .gitignore) and
+    then kept current with a Gio.FileMonitor per indexed directory. Paths
+    are stored once, relative to the root, next to two search blobs (base
+    names and full paths, lowercased and newline-joined) that a regular
+    expression scans, so only likely candidates are ranked in Python.
+
+    The path list is append-only: removed paths are left in place and
+    skipped until enough of them pile up to rebuild the blobs. Paths found
+    in a new subfolder are added at once and searchable after the blobs
+    are rebuilt on a background thread.
+    """
+
+    def __init__(self):
+        self.root = None
+        self._paths = []
+        self._path_set = set()
+        self._names = _Blob([])
+        self._lowered = _Blob([])
+        self._rules = {}
+        self._monitors = {}
+        self._serial = 0
+        self._compacting = False
+
+    @property
+    def paths(self):
+        return [path for path in self._paths if path in self._path_set]
+
+    def start(self, folder: Gio.File):
+        """Replaces the index with a fresh walk of folder."""
+        self.stop()
+        self.root = folder.get_path()
+        if self.root is None:
+            return
+        self._walk_async("", self._serial)
+
+    def stop(self):
+        for monitor in self._monitors.values():
+            monitor.cancel()
+        self._monitors.clear()
+        self._serial += 1
+        self._compacting = False
+        self._set_paths([], _Blob([]), _Blob([]))
+        self._rules = {}
+        self.root = None
+
+    def _set_paths(self, paths, names, lowered):
+        self._paths = paths
+        self._path_set = set(paths)
+        self._names = names
+        self._lowered = lowered
+
+    def _walk_async(self, start: str, serial: int):
+        root = self.root
+        rules = dict(self._rules)
+
+        def run():
+            paths, directories, found_rules = walk(root, start, rules)
+            names, lowered = _build_blobs(paths)
+            GLib.idle_add(
+                self._on_walk_done, serial,
+                (paths, names, lowered, directories, found_rules))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _on_walk_done(self, serial: int, result):
+        if serial != self._serial:
+            return False
+        paths, names, lowered, directories, rules = result
+        self._rules.update(rules)
+        if not self._paths:
+            self._set_paths(paths, names, lowered)
+        else:
+            self._add_all(paths)
+        for directory in directories:
+            self._watch(directory)
+        return False
+
+    def _compact_async(self):
+        """
+        Rebuilds the blobs from every live path, off the main thread,
+        dropping removed paths and taking in those not in the blobs yet.
+        """
+        if self._compacting:
+            return
+        self._compacting = True
+        serial = self._serial
+        count = len(self._paths)
+        paths = self.paths
+
+        def run():
+            names, lowered = _build_blobs(paths)
+            GLib.idle_add(
+                self._on_compact_done, serial, count, paths, names, lowered)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _on_compact_done(self, serial, count, paths, names, lowered):
+        if serial != self._serial:
+            return False
+        self._compacting = False
+        # Paths added meanwhile are appended to the new blobs; those removed
+        # meanwhile stay out of _path_set, so searches skip them.
+        added = self._paths[count:]
+        self._paths = paths + added
+        self._names, self._lowered = names, lowered
+        if added:
+            self._extend_blobs(added)
+        return False
+
+    def _watch(self, rel_dir: str):
+        if rel_dir in self._monitors or len(self._monitors) >= MAX_MONITORS:
+            return
+        directory = Gio.File.new_for_path(
+            os.path.join(self.root, rel_dir) if rel_dir else self.root)
+        try:
+            monitor = directory.monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.Error:
+            return
+        monitor.connect("changed", self._on_changed, rel_dir)
+        self._monitors[rel_dir] = monitor
+
+    def _unwatch(self, rel_dir: str):
+        prefix = rel_dir + "/"
+        for watched in list(self._monitors):
+            if watched == rel_dir or watched.startswith(prefix):
+                self._monitors.pop(watched).cancel()
+
+    def _on_changed(self, monitor, file, other_file, event_type, rel_dir):
+        if event_type in (
+            Gio.FileMonitorEvent.CREATED,
+            Gio.FileMonitorEvent.MOVED_IN,
+        ):
+            self._on_created(rel_dir, file)
+        elif event_type in (
+            Gio.FileMonitorEvent.DELETED,
+            Gio.FileMonitorEvent.MOVED_OUT,
+        ):
+            self._on_deleted(rel_dir, file)
+        elif event_type == Gio.FileMonitorEvent.RENAMED:
+            self._on_deleted(rel_dir, file)
+            self._on_created(rel_dir, other_file)
+        elif (event_type == Gio.FileMonitorEvent.CHANGES_DONE_HINT
+                and file.get_basename() == ".gitignore"):
+            self._restart()
+
+    def _restart(self):
+        # The ignore rules changed; start over.
+        self.start(Gio.File.new_for_path(self.root))
+
+    def _rel_path(self, rel_dir: str, file: Gio.File):
+        name = file.get_basename()
+        return f"{rel_dir}/{name}" if rel_dir else name
+
+    def _on_created(self, rel_dir: str, file: Gio.File):
+        rel_path = self._rel_path(rel_dir, file)
+        if file.get_basename() == ".gitignore":
+            self._restart()
+            return
+        file_type = file.query_file_type(
+            Gio.FileQueryInfoFlags.NOFOLLOW_SYMLINKS, None)
+        if file_type == Gio.FileType.DIRECTORY:
+            if (file.get_basename() not in ALWAYS_IGNORED
+                    and not is_ignored(self._rules, rel_path, True)):
+                self._walk_async(rel_path, self._serial)
+        elif (rel_path.lower().endswith(MARKDOWN_EXTENSIONS)
+                and not is_ignored(self._rules, rel_path, False)):
+            self._add(rel_path)
+
+    def _on_deleted(self, rel_dir: str, file: Gio.File):
+        rel_path = self._rel_path(rel_dir, file)
+        if file.get_basename() == ".gitignore":
+            self._restart()
+        elif rel_path in self._path_set:
+            self._remove(rel_path)
+        elif rel_path in self._monitors:
+            self._unwatch(rel_path)
+            prefix = rel_path + "/"
+            for path in [p for p in self._path_set if p.startswith(prefix)]:
+                self._remove(path)
+
+    def _add(self, rel_path: str):
+        if rel_path in self._path_set:
+            return
+        if len(self._names.lines) == len(self._paths):
+            # Otherwise a rebuild is on its way and will take it in.
+            self._extend_blobs([rel_path])
+        self._path_set.add(rel_path)
+        self._paths.append(rel_path)
+
+    def _add_all(self, rel_paths):
+        added = [path for path in rel_paths if path not in self._path_set]
+        if not added:
+            return
+        self._path_set.update(added)
+        self._paths.extend(added)
+        self._compact_async()
+
+    def _extend_blobs(self, rel_paths):
+        lowered = [path.lower() for path in rel_paths]
+        self._names.extend([path.rsplit("/", 1)[-1] for path in lowered])
+        self._lowered.extend(lowered)
+
+    def _remove(self, rel_path: str):
+        self._path_set.discard(rel_path)
+        removed = len(self._paths) - len(self._path_set)
+        if removed > max(1000, len(self._paths) // 4):
+            self._compact_async()
+
+    def search(self, query: str, limit=RESULT_LIMIT):
+        """
+        Returns up to limit relative paths matching query, best first.
+        Base name substring matches rank above fuzzy matches that fit in
+        the base name, which rank above fuzzy matches across the path.
+        Scanning stops after SEARCH_BUDGET seconds, so rare fuzzy matches
+        in very large indexes may be left out.
+        """
+        query = "".join(query.lower().split())
+        if not query:
+            return self.paths[:limit]
+
+        paths = self._paths
+        live = self._path_set
+        names = self._names
+        lowered = self._lowered
+        substring = re.compile(f"({re.escape(query)})")
+        # Starting on a literal lets the regex engine jump between
+        # occurrences of the first character; every following character is
+        # reached by possessively skipping everything that is not it, so a
+        # failed attempt never backtracks.
+        first, rest = re.escape(query[0]), query[1:]
+        fuzzy = re.compile(f"({first})" + "".join(
+            f"[^\\n{re.escape(c)}]*+({re.escape(c)})" for c in rest))
+
+        characters = set(query)
+        deadline = time.monotonic() + SEARCH_BUDGET
+        seen = set()
+        ranked = []
+
+        def collect(blob, pattern, rank):
+            for match in blob.finditer(pattern, characters, deadline):
+                index = bisect.bisect_right(blob.offsets, match.start()) - 1
+                if index in seen or paths[index] not in live:
+                    continue
+                seen.add(index)
+                span = match.end() - match.start(1)
+                ranked.append((rank(index), span, len(paths[index]), index))
+                if len(ranked) >= MAX_CANDIDATES:
+                    return
+
+        collect(names, substring, lambda index: 0)
+        if len(ranked) < limit:
+            collect(lowered, fuzzy, lambda index: (
+                1 if fuzzy.search(names.lines[index]) else 2))
+
+        ranked.sort()
+        return [paths[index] for *_, index in ranked[:limit]]
+
+
+def _build_blobs(paths):
+    lowered = [path.lower() for path in paths]
+    names = [path.rsplit("/", 1)[-1] for path in lowered]
+    return _Blob(names), _Blob(lowered)
+
+
+class _Blob:
+    """
+    Lines joined into one string, split into buckets that remember which
+    characters they contain so searches can skip buckets that cannot match.
+    """
+
+    BUCKET_LINES = 256
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.text = "\n".join(lines)
+        self.offsets = []
+        position = 0
+        for line in lines:
+            self.offsets.append(position)
+            position += len(line) + 1
+        self.buckets = []
+        for first in range(0, len(lines), self.BUCKET_LINES):
+            start = self.offsets[first]
+            last = first + self.BUCKET_LINES
+            end = self.offsets[last] - 1 if last < len(lines) else len(self.text)
+            self.buckets.append(
+                [start, end, frozenset(self.text[start:end])])
+
+    def extend(self, lines):
+        """Appends lines, joining the text once for all of them."""
+        added = "\n".join(lines)
+        start = len(self.text) + 1 if self.lines else 0
+        self.text = self.text + "\n" + added if self.lines else added
+        for line in lines:
+            self.offsets.append(start)
+            self.lines.append(line)
+            end = start + len(line)
+            if len(self.lines) % self.BUCKET_LINES == 1:
+                self.buckets.append([start, end, frozenset(line)])
+            else:
+                bucket = self.buckets[-1]
+                bucket[1] = end
+                bucket[2] = bucket[2] | frozenset(line)
+            start = end + 1
+
+    def finditer(self, pattern, characters, deadline):
+        for start, end, contained in self.buckets:
+            if characters <= contained:
+                yield from pattern.finditer(self.text, start, end)
+                if time.monotonic() > deadline:
+                    return
@@ -1,6 +1,11 @@
 # src/core/file_manager.py
+import codecs
+
 from gi.repository import Gio, GLib
 
+# Bytes read, or characters written, per step of a streaming load or save.
+CHUNK_SIZE = 256 * 1024
+
 
 class FileManager:
     def __init__(self):
@@ -39,6 +44,25 @@ class FileManager:
         except GLib.Error as e:
             return False, e.message
 
+    def load_file_stream_async(self, file: Gio.File, on_chunk, on_progress,
+                               on_done):
+        """
+        Asynchronously reads a file in chunks, decoding UTF-8 incrementally.
+
+        on_chunk(text) receives each decoded piece, on_progress(fraction)
+        the share of the file read so far (or None if the size is unknown),
+        and on_done(success, message) is called once at the end.
+        """
+        _StreamingLoad(file, on_chunk, on_progress, on_done).start()
+
+    def save_file_stream_async(self, file: Gio.File, chunks, on_done):
+        """
+        Asynchronously writes an iterable of text chunks to a file, one
+        chunk at a time, so only one encoded chunk is held in memory.
+        on_done(file, success, message) is called once at the end.
+        """
+        _StreamingSave(file, chunks, on_done).start()
+
     def get_file_type(self, file: Gio.File):
         """Returns the file type of a Gio.File."""
         try:
@@ -48,3 +72,127 @@ class FileManager:
             return file_info.get_file_type()
         except GLib.Error:
             return Gio.FileType.UNKNOWN
+
+
+class _StreamingLoad:
+    def __init__(self, file: Gio.File, on_chunk, on_progress, on_done):
+        self.file = file
+        self.on_chunk = on_chunk
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.size = 0
+        self.read = 0
+        self.stream = None
+
+    def start(self):
+        self.file.query_info_async(
+            "standard::size",
+            Gio.FileQueryInfoFlags.NONE,
+            GLib.PRIORITY_DEFAULT,
+            None,
+            self._on_info_ready,
+        )
+
+    def _on_info_ready(self, file: Gio.File, result):
+        try:
+            self.size = file.query_info_finish(result).get_size()
+        except GLib.Error:
+            self.size = 0
+        file.read_async(GLib.PRIORITY_DEFAULT, None, self._on_stream_ready)
+
+    def _on_stream_ready(self, file: Gio.File, result):
+        try:
+            self.stream = file.read_finish(result)
+        except GLib.Error as e:
+            self.on_done(False, e.message)
+            return
+        self._read_next()
+
+    def _read_next(self):
+        self.stream.read_bytes_async(
+            CHUNK_SIZE, GLib.PRIORITY_DEFAULT, None, self._on_bytes_ready)
+
+    def _on_bytes_ready(self, stream: Gio.InputStream, result):
+        try:
+            data = stream.read_bytes_finish(result).get_data()
+            text = self.decoder.decode(data, final=not data)
+        except GLib.Error as e:
+            self._finish(False, e.message)
+            return
+        except UnicodeError:
+            self._finish(False, "Invalid text encoding.")
+            return
+
+        if text:
+            self.on_chunk(text)
+        if not data:
+            self._finish(True, "File loaded successfully.")
+            return
+        self.read += len(data)
+        self.on_progress(min(self.read / self.size, 1.0) if self.size else None)
+        self._read_next()
+
+    def _finish(self, success, message):
+        self.stream.close_async(GLib.PRIORITY_DEFAULT, None, None)
+        self.on_done(success, message)
+
+
+class _StreamingSave:
+    def __init__(self, file: Gio.File, chunks, on_done):
+        self.file = file
+        self.chunks = iter(chunks)
+        self.on_done = on_done
+        self.stream = None
+
+    def start(self):
+        self.file.replace_async(
+            None,
+            False,
+            Gio.FileCreateFlags.NONE,
+            GLib.PRIORITY_DEFAULT,
+            None,
+            self._on_stream_ready,
+        )
+
+    def _on_stream_ready(self, file: Gio.File, result):
+        try:
+            self.stream = file.replace_finish(result)
+        except GLib.Error as e:
+            self.on_done(self.file, False, e.message)
+            return
+        self._write_next()
+
+    def _write_next(self):
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.stream.close_async(
+                GLib.PRIORITY_DEFAULT, None, self._on_closed)
+            return
+        self.stream.write_all_async(
+            chunk.encode("utf-8"),
+            GLib.PRIORITY_DEFAULT,
+            None,
+            self._on_written,
+        )
+
+    def _on_written(self, stream: Gio.OutputStream, result):
+        try:
+            stream.write_all_finish(result)
+        except GLib.Error as e:
+            # A normal close would commit the partial file over the original;
+            # closing with a cancelled cancellable discards it instead.
+            cancellable = Gio.Cancellable()
+            cancellable.cancel()
+            stream.close_async(GLib.PRIORITY_DEFAULT, cancellable, None)
+            self.on_done(self.file, False, e.message)
+            return
+        self._write_next()
+
+    def _on_closed(self, stream: Gio.OutputStream, result):
+        try:
+            stream.close_finish(result)
+        except GLib.Error as e:
+            self.on_done(self.file, False, e.message)
+            return
+        self.on_done(self.file, True, "File saved successfully.")
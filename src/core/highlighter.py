@@ -0,0 +1,155 @@
+# src/core/highlighter.py
+import time
+
+from gi.repository import GLib, Gtk, Pango
+
+from .markdown_tokens import START, tokenize_line
+
+# Seconds spent highlighting after an edit; lines left over when it runs
+# out are highlighted at idle time, IDLE_BUDGET seconds per callback.
+EDIT_BUDGET = 0.004
+IDLE_BUDGET = 0.008
+
+# Later tags take priority, e.g. a directive inside a comment.
+TAG_STYLES = {
+    "heading": {"weight": Pango.Weight.BOLD, "foreground": "#1c71d8"},
+    "strong": {"weight": Pango.Weight.BOLD},
+    "emphasis": {"style": Pango.Style.ITALIC},
+    "marker": {"weight": Pango.Weight.BOLD, "foreground": "#e66100"},
+    "link": {"foreground": "#3584e4", "underline": Pango.Underline.SINGLE},
+    "image": {"foreground": "#2190a4"},
+    "html": {"foreground": "#986a44"},
+    "code": {"foreground": "#c061cb"},
+    "code-block": {"foreground": "#c061cb"},
+    "slide-break": {"weight": Pango.Weight.BOLD, "foreground": "#9141ac"},
+    "front-matter": {"foreground": "#26a269"},
+    "comment": {"style": Pango.Style.ITALIC, "foreground": "#77767b"},
+    "directive": {"weight": Pango.Weight.BOLD, "foreground": "#e66100"},
+}
+
+
+class MarkdownHighlighter:
+    """
+    Highlights Markdown, Marp directives and front matter in a
+    Gtk.TextBuffer.
+
+    The tokenizer state at the start of every line is kept. After an
+    edit, only the lines it touched are tokenized and tagged again, and
+    the lines after them only until the state at a line start matches the
+    previous pass; from there on, nothing changed. Whatever does not fit
+    in EDIT_BUDGET (e.g. the rest of the deck after opening a code fence),
+    and the whole buffer after rehighlight(), is tagged at idle time.
+    """
+
+    def __init__(self, buffer: Gtk.TextBuffer):
+        self.buffer = buffer
+        self.tags = [
+            buffer.create_tag(f"markdown-{name}", **style)
+            for name, style in TAG_STYLES.items()
+        ]
+        self._tags_by_name = dict(zip(TAG_STYLES, self.tags))
+        # states[i] is the state at the start of line i; the last entry is
+        # the state after the last line.
+        self.states = [START, START]
+        # Lines from here on are yet to be highlighted, or None.
+        self._pending = None
+        self._paused = False
+        self._idle_id = 0
+        self._deleted_lines = 0
+        buffer.connect_after("insert-text", self._on_insert_text)
+        buffer.connect("delete-range", self._on_delete_range)
+        buffer.connect_after("delete-range", self._on_range_deleted)
+
+    def pause(self):
+        """Stops following edits, e.g. while a file streams in."""
+        self._paused = True
+        self._cancel_idle()
+
+    def rehighlight(self):
+        """Highlights the whole buffer again at idle time, and resumes."""
+        self._paused = False
+        self.states = [START] * (self.buffer.get_line_count() + 1)
+        self._pending = 0
+        self._schedule()
+
+    def _on_insert_text(self, buffer, location, text, length):
+        if self._paused:
+            return
+        # After the default handler, location is at the end of the text.
+        end_line = location.get_line()
+        added = text.count("\n")
+        line = end_line - added
+        self.states[line + 1:line + 1] = [None] * added
+        if self._pending is not None and self._pending > line:
+            self._pending += added
+        self._update(line, end_line)
+
+    def _on_delete_range(self, buffer, start, end):
+        self._deleted_lines = end.get_line() - start.get_line()
+
+    def _on_range_deleted(self, buffer, start, end):
+        if self._paused:
+            return
+        line = start.get_line()
+        removed = self._deleted_lines
+        del self.states[line + 1:line + 1 + removed]
+        if self._pending is not None and self._pending > line:
+            self._pending = max(line, self._pending - removed)
+        self._update(line, line)
+
+    def _update(self, first: int, last: int):
+        """Highlights lines first to last and whatever they affect."""
+        if self._pending is not None and first >= self._pending:
+            return  # The idle pass has yet to get here.
+        self._highlight(first, last, time.monotonic() + EDIT_BUDGET)
+
+    def _highlight(self, line: int, last: int, deadline: float):
+        states = self.states
+        count = self.buffer.get_line_count()
+        state = states[line]
+        while line < count:
+            state = self._highlight_line(line, state)
+            line += 1
+            pending = self._pending is not None and line >= self._pending
+            if not pending and line > last and states[line] == state:
+                return  # The rest is as the previous pass left it.
+            states[line] = state
+            if line < count and time.monotonic() > deadline:
+                self._pending = line
+                self._schedule()
+                return
+        self._pending = None
+
+    def _highlight_line(self, line: int, state: str):
+        buffer = self.buffer
+        _found, start = buffer.get_iter_at_line(line)
+        end = start.copy()
+        if not end.ends_line():
+            end.forward_to_line_end()
+        tokens, state = tokenize_line(buffer.get_text(start, end, True), state)
+        for tag in self.tags:
+            buffer.remove_tag(tag, start, end)
+        for token_start, token_end, name in tokens:
+            first = start.copy()
+            first.set_line_offset(token_start)
+            last = start.copy()
+            last.set_line_offset(token_end)
+            buffer.apply_tag(self._tags_by_name[name], first, last)
+        return state
+
+    def _schedule(self):
+        if not self._idle_id:
+            self._idle_id = GLib.idle_add(
+                self._on_idle, priority=GLib.PRIORITY_LOW)
+
+    def _cancel_idle(self):
+        if self._idle_id:
+            GLib.source_remove(self._idle_id)
+            self._idle_id = 0
+
+    def _on_idle(self):
+        self._idle_id = 0
+        if self._pending is not None and not self._paused:
+            self._highlight(self._pending, self._pending,
+                            time.monotonic() + IDLE_BUDGET)
+        return False
@@ -0,0 +1,144 @@
+# src/core/image_paths.py
+import bisect
+import os
+import re
+from collections import OrderedDict
+from urllib.parse import quote, unquote, urlsplit
+
+ASSET_PREFIX = "marp://asset"
+# Every way a Marp deck can reference an image: Markdown images (including
+# Marp's ![bg](...) backgrounds), src attributes of inline HTML, and CSS
+# url() in <style> blocks and backgroundImage directives.
+IMAGE_REFERENCE = re.compile(
+    r"(!\[[^\]\n]*\]\(\s*)(<[^>\n]+>|[^)\s]+)"
+    r"|(\bsrc\s*=\s*[\"'])([^\"'\n]+)"
+    r"|(\burl\(\s*[\"']?)([^\"')\n]+)"
+)
+# Where IMAGE_REFERENCE may match. Leading with a character class lets
+# the regex engine skip ahead quickly; only the lines found are parsed.
+HINT = re.compile(r"[!su](?:(?<=!)\[|(?<=s)rc\s*=|(?<=u)rl\()")
+CODE_SPAN = re.compile(r"(`+).+?(?<!`)\1(?!`)")
+FENCE_LINE = re.compile(r"^ {0,3}(`{3,}|~{3,})", re.MULTILINE)
+
+
+def _fenced_ranges(markdown_content: str):
+    """
+    Returns the sorted start and end offsets of the fenced code blocks, so
+    an offset is inside a block when bisect_right() returns an odd index.
+    """
+    if "```" not in markdown_content and "~~~" not in markdown_content:
+        return []
+    offsets = []
+    fence = None
+    for match in FENCE_LINE.finditer(markdown_content):
+        marker = match.group(1)
+        if fence is None:
+            fence = marker
+            offsets.append(match.start())
+        elif marker.startswith(fence):
+            fence = None
+            offsets.append(match.end())
+    return offsets
+
+
+class ImagePathRewriter:
+    """
+    Rewrites the image references of a deck that point at local files by
+    absolute path or file:// URI into paths relative to the deck's folder,
+    which is what the preview's marp://asset handler serves. Relative
+    paths are already in that form; remote URLs, data URIs and anchors are
+    left alone, as is anything inside fenced code blocks and code spans.
+
+    Only lines that can hold a reference are parsed. Rewritten lines are
+    cached per (base dir, line) and resolved paths per (base dir, reference), so
+    after an edit only the changed lines are parsed again.
+    Runs on the conversion thread; instances are not shared between
+    threads.
+    """
+
+    def __init__(self, max_lines=8192, max_paths=4096):
+        self.max_lines = max_lines
+        self.max_paths = max_paths
+        self._lines = OrderedDict()
+        self._paths = OrderedDict()
+
+    def clear(self):
+        self._lines.clear()
+        self._paths.clear()
+
+    def rewrite(self, markdown_content: str, base_dir: str):
+        """Returns markdown_content with its image references resolved."""
+        fenced = _fenced_ranges(markdown_content)
+        pieces = []
+        position = 0
+        for match in HINT.finditer(markdown_content):
+            start = markdown_content.rfind("\n", 0, match.start()) + 1
+            if start < position:
+                continue  # Same line as the previous hint.
+            end = markdown_content.find("\n", match.end())
+            end = len(markdown_content) if end == -1 else end
+            index = bisect.bisect_right(fenced, start)
+            if index % 2:
+                continue  # Inside a fenced code block.
+            line = markdown_content[start:end]
+            pieces.append(markdown_content[position:start])
+            pieces.append(self._rewrite_line(line, base_dir))
+            position = end
+        if not pieces:
+            return markdown_content
+        pieces.append(markdown_content[position:])
+        return "".join(pieces)
+
+    def _rewrite_line(self, line: str, base_dir: str):
+        key = (base_dir, line)
+        rewritten = self._lines.get(key)
+        if rewritten is not None:
+            self._lines.move_to_end(key)
+            return rewritten
+
+        code_spans = (
+            [span.span() for span in CODE_SPAN.finditer(line)]
+            if "`" in line else ())
+
+        def replace(match):
+            if any(start <= match.start() < end for start, end in code_spans):
+                return match.group(0)
+            for group in (1, 3, 5):
+                if match.group(group) is not None:
+                    prefix, target = match.group(group, group + 1)
+                    break
+            bracketed = target.startswith("<")
+            path = self.resolve(target.strip("<>"), base_dir)
+            if path is None:
+                return match.group(0)
+            return prefix + (f"<{path}>" if bracketed else path)
+
+        rewritten = IMAGE_REFERENCE.sub(replace, line)
+        self._store(self._lines, key, rewritten, self.max_lines)
+        return rewritten
+
+    def resolve(self, target: str, base_dir: str):
+        """
+        Returns the path, relative to base_dir and URL-quoted, that replaces
+        an image reference, or None if it is to be left as it is.
+        """
+        key = (base_dir, target)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            return self._paths[key]
+
+        path = None
+        if target.startswith("file:") or (
+                target.startswith("/") and not target.startswith("//")):
+            parts = urlsplit(target)
+            path = quote(os.path.relpath(unquote(parts.path), base_dir))
+            if parts.fragment:
+                path += "#" + parts.fragment
+        self._store(self._paths, key, path, self.max_paths)
+        return path
+
+    def _store(self, cache, key, value, limit):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
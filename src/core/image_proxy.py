@@ -0,0 +1,177 @@
+# src/core/image_proxy.py
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import gi
+gi.require_version("GdkPixbuf", "2.0")
+from gi.repository import GdkPixbuf, GLib  # noqa: E402
+
+from .metrics import preview_metrics  # noqa: E402
+
+# Proxy sizes are rounded up to a multiple of this, so resizing the pane
+# does not produce a new set of proxies for every width.
+SIZE_STEP = 512
+MAX_SIZE = 4096
+# Marp lays slides out this many CSS pixels wide (and fewer high). Proxies
+# are never smaller, so an image keeps the layout size it has in exports.
+SLIDE_WIDTH = 1280
+# Formats worth downscaling. SVGs scale by themselves and GIFs may be
+# animated, so those are always served as they are.
+PROXY_TYPES = ("image/jpeg", "image/png", "image/webp", "image/tiff",
+               "image/bmp")
+JPEG_QUALITY = "85"
+# The cache folder is pruned after this many proxies were written.
+PRUNE_EVERY = 32
+# Part of every proxy's name; bumped when proxies are made differently.
+PROXY_VERSION = 2
+# Images found small enough to serve as they are, remembered at most.
+MAX_ORIGINALS = 4096
+
+
+def proxy_size(width: int, scale_factor: int = 1):
+    """Returns the proxy size for a preview this many pixels wide."""
+    pixels = max(width, SLIDE_WIDTH) * max(scale_factor, 1)
+    return min(-(-pixels // SIZE_STEP) * SIZE_STEP, MAX_SIZE)
+
+
+class ImageProxy:
+    """
+    Downscaled copies of large images for the preview.
+
+    A slide never shows an image larger than the preview pane, so decoding
+    a camera photo at full resolution on every reload only costs memory
+    and time. Images whose shorter side is larger than the requested size
+    are scaled down until it is that size, on a pool of worker threads.
+    As size is at least the slide's width, both sides stay at least as
+    large as the slide, so themes that cap images at the slide's size lay
+    out the proxy exactly like the original. Proxies are written to
+    $XDG_CACHE_HOME/presentat/images, named after the image's path,
+    modification time, file size and the requested size, so an edited
+    image or a different size gets a new proxy. The folder is pruned to
+    max_disk_bytes, oldest first.
+
+    Only the marp://asset handler uses proxies; exports read the original
+    files.
+    """
+
+    def __init__(self, directory=None, workers=None,
+                 max_disk_bytes=256 * 1024 * 1024):
+        self.directory = directory or os.path.join(
+            GLib.get_user_cache_dir(), "presentat", "images")
+        self.max_disk_bytes = max_disk_bytes
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers or min(4, os.cpu_count() or 1),
+            thread_name_prefix="image-proxy")
+        # key -> callbacks waiting for the proxy being made.
+        self._pending = {}
+        # Keys of images already small enough to be served as they are,
+        # least recently used first.
+        self._originals = OrderedDict()
+        self._written = 0
+
+    def handles(self, mime_type: str):
+        return mime_type in PROXY_TYPES
+
+    def lookup(self, path: str, mtime: int, file_size: int, size: int,
+               callback):
+        """
+        Finds or makes the proxy of the image at path. callback is called
+        on the main loop with (proxy_path, proxy_bytes, mime_type), or with
+        None when the original should be used instead.
+        """
+        key = hashlib.blake2b(
+            f"{PROXY_VERSION}\0{path}\0{mtime}\0{file_size}\0{size}"
+            .encode("utf-8"),
+            digest_size=16).hexdigest()
+        if key in self._originals:
+            self._originals.move_to_end(key)
+            callback(None)
+            return
+        callbacks = self._pending.get(key)
+        if callbacks is not None:
+            callbacks.append(callback)
+            return
+        self._pending[key] = [callback]
+        self._pool.submit(self._run, key, path, size)
+
+    def _run(self, key: str, path: str, size: int):
+        try:
+            proxy = self._find(key) or self._make(key, path, size)
+        except (GLib.Error, OSError) as e:
+            print(f"Unable to downscale {path}: {e}")
+            proxy = None
+        GLib.idle_add(self._deliver, key, proxy)
+
+    def _deliver(self, key: str, proxy):
+        if proxy is None:
+            self._originals[key] = True
+            while len(self._originals) > MAX_ORIGINALS:
+                self._originals.popitem(last=False)
+        for callback in self._pending.pop(key, ()):
+            callback(proxy)
+        return False
+
+    def _find(self, key: str):
+        for extension, mime_type in (("jpg", "image/jpeg"),
+                                     ("png", "image/png")):
+            file_name = os.path.join(self.directory, f"{key}.{extension}")
+            try:
+                return file_name, os.stat(file_name).st_size, mime_type
+            except FileNotFoundError:
+                pass
+        return None
+
+    def _make(self, key: str, path: str, size: int):
+        image_format, width, height = GdkPixbuf.Pixbuf.get_file_info(path)
+        if image_format is None or min(width, height) <= size:
+            return None
+
+        started = time.monotonic()
+        # Loaders such as JPEG decode straight at the smaller size. Both
+        # sides are scaled alike, so the EXIF rotation applied below only
+        # swaps them.
+        scale = size / min(width, height)
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
+            path, max(round(width * scale), size),
+            max(round(height * scale), size), True)
+        pixbuf = pixbuf.apply_embedded_orientation() or pixbuf
+        if pixbuf.get_has_alpha():
+            extension, image_type, options = "png", "png", ([], [])
+        else:
+            extension, image_type = "jpg", "jpeg"
+            options = (["quality"], [JPEG_QUALITY])
+
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = os.path.join(self.directory, f"{key}.{extension}")
+        tmp_name = f"{file_name}.{os.getpid()}.tmp"
+        pixbuf.savev(tmp_name, image_type, *options)
+        os.replace(tmp_name, file_name)
+        preview_metrics.record("proxy", time.monotonic() - started)
+
+        self._written += 1
+        if self._written % PRUNE_EVERY == 0:
+            self._prune()
+        return file_name, os.stat(file_name).st_size, f"image/{image_type}"
+
+    def _prune(self):
+        """Deletes the least recently written proxies over max_disk_bytes."""
+        files = []
+        total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith((".jpg", ".png")):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        files.sort()
+        for _mtime, size, file_name in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(file_name)
+            except FileNotFoundError:
+                pass
+            total -= size
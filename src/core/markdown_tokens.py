@@ -0,0 +1,114 @@
+# src/core/markdown_tokens.py
+import re
+
+from .slide_renderer import (
+    FENCE, GLOBAL_DIRECTIVES, LOCAL_DIRECTIVES, SEPARATOR,
+)
+
+# Tokenizer states, carried from the end of one line to the start of the
+# next. A fenced code block's state also holds its fence, e.g. "fence:```".
+START = "start"
+TEXT = "text"
+FRONT_MATTER = "front-matter"
+COMMENT = "comment"
+FENCE_STATE = "fence:"
+
+DIRECTIVES = GLOBAL_DIRECTIVES | LOCAL_DIRECTIVES
+# Like slide_renderer.DIRECTIVE_KEY, but also matches after "<!--".
+DIRECTIVE_KEY = re.compile(r"\s*(_?)([A-Za-z][\w-]*)\s*:")
+FRONT_MATTER_DELIMITER = re.compile(r"^---[ \t]*$")
+HEADING = re.compile(r"^ {0,3}#{1,6}(?:[ \t]|$)")
+QUOTE_MARKER = re.compile(r"^ {0,3}(?:>[ \t]?)+")
+LIST_MARKER = re.compile(r"[ \t]*(?:[-*+]|\d{1,9}[.)])(?=[ \t]|$)")
+INLINE = re.compile(
+    r"(?P<code>(`+).+?(?<!`)\2(?!`))"
+    r"|(?P<comment><!--.*?(?:-->|$))"
+    r"|(?P<image>!\[[^\]]*\]\([^)]*\))"
+    r"|(?P<link>\[[^\]]*\]\([^)]*\)|<https?://[^>\s]+>)"
+    r"|(?P<strong>\*\*(?=\S).+?(?<=\S)\*\*|__(?=\S).+?(?<=\S)__)"
+    r"|(?P<emphasis>\*(?=[^\s*]).+?(?<=[^\s*])\*"
+    r"|(?<!\w)_(?=[^\s_]).+?(?<=[^\s_])_(?!\w))"
+    r"|(?P<html></?[A-Za-z][^>]*>)"
+)
+
+
+def tokenize_line(line: str, state: str):
+    """
+    Tokenizes one line of a Marp deck, given the state at its start.
+    Returns (tokens, state): tokens are (start, end, name) spans of the
+    line, in characters, and state is the state at the start of the next
+    line. Spans may nest, e.g. a directive inside a comment.
+    """
+    tokens = []
+    if state == START:
+        if FRONT_MATTER_DELIMITER.match(line):
+            tokens.append((0, len(line), "front-matter"))
+            return tokens, FRONT_MATTER
+        state = TEXT
+    if state == FRONT_MATTER:
+        tokens.append((0, len(line), "front-matter"))
+        if FRONT_MATTER_DELIMITER.match(line):
+            return tokens, TEXT
+        _directive(line, 0, tokens, front_matter=True)
+        return tokens, FRONT_MATTER
+    if state.startswith(FENCE_STATE):
+        tokens.append((0, len(line), "code-block"))
+        if _closes_fence(line, state[len(FENCE_STATE):]):
+            return tokens, TEXT
+        return tokens, state
+    if state == COMMENT:
+        end = line.find("-->")
+        _directive(line, 0, tokens)
+        if end == -1:
+            tokens.append((0, len(line), "comment"))
+            return tokens, COMMENT
+        tokens.append((0, end + 3, "comment"))
+        return tokens, _inline(line, end + 3, tokens)
+
+    match = FENCE.match(line)
+    if match:
+        tokens.append((0, len(line), "code-block"))
+        return tokens, FENCE_STATE + match.group(1)
+    if SEPARATOR.match(line):
+        tokens.append((0, len(line), "slide-break"))
+        return tokens, TEXT
+    if HEADING.match(line):
+        tokens.append((0, len(line), "heading"))
+        return tokens, _inline(line, 0, tokens)
+    position = 0
+    match = QUOTE_MARKER.match(line)
+    if match:
+        tokens.append((0, match.end(), "marker"))
+        position = match.end()
+    match = LIST_MARKER.match(line, position)
+    if match:
+        tokens.append((position, match.end(), "marker"))
+        position = match.end()
+    return tokens, _inline(line, position, tokens)
+
+
+def _inline(line, position, tokens):
+    """Adds the inline spans of line from position; returns the state."""
+    for match in INLINE.finditer(line, position):
+        name = match.lastgroup
+        tokens.append((match.start(), match.end(), name))
+        if name == "comment":
+            _directive(line, match.start() + 4, tokens)
+            if not match.group().endswith("-->"):
+                return COMMENT
+    return TEXT
+
+
+def _directive(line, position, tokens, front_matter=False):
+    """Adds a span for the directive key at position, if there is one."""
+    match = DIRECTIVE_KEY.match(line, position)
+    if match and (front_matter or match.group(2) in DIRECTIVES):
+        tokens.append((match.start(1), match.end(2), "directive"))
+
+
+def _closes_fence(line, fence):
+    stripped = line.lstrip(" ")
+    if len(line) - len(stripped) > 3:
+        return False
+    stripped = stripped.rstrip()
+    return len(stripped) >= len(fence) and stripped == fence[0] * len(stripped)
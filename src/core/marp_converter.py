@@ -1,34 +1,155 @@
 # src/core/marp_converter.py
+import os
 import subprocess
 import shutil
+import threading
+
+from .image_paths import ImagePathRewriter
+from .marp_server import MarpServer, MarpServerError
+from .metrics import preview_metrics
+from .slide_renderer import SlideRenderer, slide_start_lines
+
+PREVIEW_STYLE = """
+body { margin: 0; padding: 16px; background: #3d3d3d; }
+div.marpit > svg[data-marpit-svg] {
+  display: block;
+  width: 100%;
+  height: auto;
+  margin: 0 auto 16px;
+  box-shadow: 0 2px 8px rgba(0, 0, 0, 0.4);
+}
+"""
+
+
+def build_document(html: str, css: str):
+    """Wraps marp-core output in a standalone HTML document."""
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<style>{css}</style><style>{PREVIEW_STYLE}</style>"
+        f"</head><body>{html}</body></html>"
+    )
+
+
+MARP_MISSING = "Marp CLI not found. Please ensure it's on the PATH."
 
 
 class MarpConverter:
-    def __init__(self):
+    def __init__(self, use_server=True):
         self.marp_path = shutil.which("marp")
-        if not self.marp_path:
-            raise RuntimeError(
-                "Marp CLI not found. Please ensure it's on the PATH.")
+        use_server = use_server and self.marp_path is not None
+        self.server = MarpServer(self.marp_path) if use_server else None
+        self.slide_renderer = SlideRenderer(self.server) if use_server else None
+        self.image_paths = ImagePathRewriter()
+        self._cli_process = None
+        self._cli_lock = threading.Lock()
+
+    @property
+    def available(self):
+        """Whether Marp was found; without it every conversion fails."""
+        return self.marp_path is not None
+
+    def warm_up(self):
+        """Starts the Marp worker in the background, ahead of first use."""
+        if self.server and self.server.available:
+            threading.Thread(target=self.server.start, daemon=True).start()
+
+    def cache_options(self):
+        """
+        Describes the settings a rendered deck depends on besides its
+        source, for keying cached renders.
+        """
+        try:
+            mtime = os.path.getmtime(os.path.realpath(self.marp_path))
+        except OSError:
+            mtime = 0
+        backend = "worker" if self.server and self.server.available else "cli"
+        return f"{backend}:{self.marp_path}:{mtime}"
+
+    def convert(self, markdown_content: str, base_dir=None):
+        """
+        Converts markdown content, preferring incremental per-slide
+        rendering on the warm Marp worker and falling back to a one-shot
+        Marp CLI run. With base_dir, local image references given as
+        absolute paths are first made relative to it, the folder the
+        preview's marp://asset handler serves them from.
+
+        Returns (success, deck) where deck is a dict holding the full
+        "html" document, its "css" and the rendered "slides". "slides" is
+        None when the document came from the Marp CLI. On failure the
+        second item is an error message.
+        deck also holds "lines", the line at which each slide starts.
+        This is a synchronous (blocking) function.
+        """
+        if base_dir:
+            with preview_metrics.timer("rewrite"):
+                markdown_content = self.image_paths.rewrite(
+                    markdown_content, base_dir)
+        with preview_metrics.timer("convert"):
+            success, result = self._convert(markdown_content)
+        if success:
+            # Rewriting image paths never adds lines, so these still match
+            # the editor.
+            result["lines"] = slide_start_lines(markdown_content)
+        return success, result
+
+    def _convert(self, markdown_content: str):
+        if not self.available:
+            return False, MARP_MISSING
+        if self.server and self.server.available:
+            try:
+                slides, styles = self.slide_renderer.render(markdown_content)
+                css = "\n".join(styles)
+                html = (
+                    '<div class="marpit">' + "".join(slides) + "</div>"
+                    + self.server.script
+                )
+                return True, {
+                    "html": build_document(html, css),
+                    "css": css,
+                    "slides": slides,
+                }
+            except MarpServerError as e:
+                print(f"Marp worker failed, falling back to CLI: {e}")
+
+        success, result = self._convert_with_cli(markdown_content)
+        if not success:
+            return False, result
+        return True, {"html": result, "css": None, "slides": None}
 
     def convert_to_html(self, markdown_content: str, base_dir=None):
+        """
+        Converts markdown content to a standalone HTML document.
+        This is a synchronous (blocking) function.
+        """
+        success, result = self.convert(markdown_content, base_dir)
+        return (True, result["html"]) if success else (False, result)
+
+    def _convert_with_cli(self, markdown_content: str):
         """
         Converts markdown content to HTML using Marp CLI.
         This is a synchronous (blocking) function.
         """
         try:
             command = [self.marp_path, "--html", "--allow-local-files", "-"]
-
-            if base_dir:
-                command.extend(["--input-dir", base_dir])
-            result = subprocess.run(
+            process = subprocess.Popen(
                 command,
-                input=markdown_content.encode("utf-8"),
+                stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                check=True,
             )
+            with self._cli_lock:
+                self._cli_process = process
+            try:
+                stdout, stderr = process.communicate(
+                    markdown_content.encode("utf-8"))
+            finally:
+                with self._cli_lock:
+                    self._cli_process = None
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(
+                    process.returncode, command, stdout, stderr)
 
-            html_content = result.stdout.decode("utf-8")
+            html_content = stdout.decode("utf-8")
             return True, html_content
 
         except subprocess.CalledProcessError as e:
@@ -43,3 +164,51 @@ class MarpConverter:
             )
         except Exception as e:
             return False, f"An unexpected error occurred: {e}"
+
+    def export_file(self, input_path: str, output_path: str, to_pdf=False):
+        """
+        Converts a Markdown file into an HTML (or PDF) file using Marp CLI.
+        This is a synchronous (blocking) function.
+        """
+        if not self.available:
+            return False, MARP_MISSING
+        command = [
+            self.marp_path, "--html", "--allow-local-files",
+            input_path, "-o", output_path,
+        ]
+        if to_pdf:
+            command.insert(1, "--pdf")
+        try:
+            subprocess.run(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=True,
+            )
+            return True, output_path
+        except subprocess.CalledProcessError as e:
+            return False, (
+                f"Marp CLI conversion failed with exit code: {e.returncode}\n"
+                + e.stderr.decode("utf-8", "replace")
+            )
+        except FileNotFoundError:
+            return (
+                False,
+                "Marp CLI was not found. Please ensure it's installed.",
+            )
+
+    def cancel(self):
+        """
+        Kills the running one-shot Marp CLI process, if any. Requests to the
+        warm worker are cheap and are left to finish.
+        """
+        with self._cli_lock:
+            process = self._cli_process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def shutdown(self):
+        """Stops the background Marp worker, if any."""
+        if self.server:
+            self.server.shutdown()
@@ -0,0 +1,95 @@
+// marp_server.js
+//
+// Copyright 2025 nam
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program.  If not, see <https://www.gnu.org/licenses/>.
+//
+// SPDX-License-Identifier: GPL-3.0-or-later
+
+// Long-lived Marp render worker.
+//
+// Reads one JSON request per line on stdin and writes one JSON response
+// per line on stdout:
+//
+//   -> {"id": 1, "markdown": "# Hello"}
+//   <- {"id": 1, "html": "...", "css": "..."}
+//   <- {"id": 1, "error": "..."}
+//
+// With "slides": true in the request, "html" is an array holding one
+// rendered slide per entry, without the container and browser script.
+// The browser script is sent once in the initial "ready" message instead.
+//
+// The first argument is the directory of the Marp CLI install, used to
+// locate the bundled @marp-team/marp-core.
+
+'use strict'
+
+const path = require('path')
+const readline = require('readline')
+
+function loadMarp(cliDir) {
+  const searchPaths = [cliDir, path.join(cliDir, 'node_modules')]
+  const corePath = require.resolve('@marp-team/marp-core', {
+    paths: searchPaths,
+  })
+  return require(corePath).Marp
+}
+
+function send(message) {
+  process.stdout.write(JSON.stringify(message) + '\n')
+}
+
+let Marp
+try {
+  Marp = loadMarp(process.argv[2] || process.cwd())
+} catch (e) {
+  send({ id: 0, error: `Unable to load marp-core: ${e.message}` })
+  process.exit(1)
+}
+
+const marp = new Marp({ html: true })
+const slideMarp = new Marp({ html: true, script: false })
+
+// marp-core appends its browser helpers (inline SVG polyfill, fitting
+// headers) as a trailing <script>; keep it aside for documents that are
+// assembled from individual slides.
+const scriptMatch = marp.render('').html.match(/<script[\s\S]*<\/script>/)
+const script = scriptMatch ? scriptMatch[0] : ''
+
+const rl = readline.createInterface({ input: process.stdin })
+
+rl.on('line', (line) => {
+  let request
+  try {
+    request = JSON.parse(line)
+  } catch (e) {
+    send({ id: 0, error: `Malformed request: ${e.message}` })
+    return
+  }
+
+  try {
+    const markdown = request.markdown || ''
+    const { html, css } = request.slides
+      ? slideMarp.render(markdown, { htmlAsArray: true })
+      : marp.render(markdown)
+    send({ id: request.id, html, css })
+  } catch (e) {
+    send({ id: request.id, error: e.stack || String(e) })
+  }
+})
+
+rl.on('close', () => process.exit(0))
+
+// Announce readiness so the client knows marp-core loaded successfully.
+send({ id: 0, ready: true, script })
@@ -0,0 +1,191 @@
+# src/core/marp_server.py
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(__file__), "marp_server.js")
+
+
+class MarpServerError(RuntimeError):
+    pass
+
+
+class MarpServerTimeout(MarpServerError):
+    pass
+
+
+class MarpServer:
+    """
+    A warm Node.js worker that renders Markdown with marp-core.
+
+    Requests are sent as one JSON object per line on the worker's stdin and
+    answered the same way on its stdout, so a render only costs the render
+    itself instead of a Node.js cold start.
+    """
+
+    # Give up on the worker after this many consecutive failed starts.
+    MAX_RESTARTS = 3
+    # Seconds to wait for the worker to start, and for each reply, before
+    # it is considered hung and killed.
+    START_TIMEOUT = 30
+    REPLY_TIMEOUT = 30
+
+    def __init__(self, marp_path: str, node_path=None):
+        self.marp_path = marp_path
+        self.node_path = node_path or shutil.which("node")
+        self._process = None
+        # Lines read from the worker's stdout by a reader thread.
+        self._lines = None
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._failed_starts = 0
+        # marp-core's browser script, sent by the worker once it is ready.
+        self.script = ""
+
+    @property
+    def available(self):
+        """Whether the worker can (still) be used."""
+        return (
+            self.node_path is not None
+            and os.path.exists(SERVER_SCRIPT)
+            and self._failed_starts < self.MAX_RESTARTS
+        )
+
+    def _cli_dir(self):
+        # The marp executable is usually a symlink to marp-cli.js inside the
+        # package directory, next to its bundled marp-core.
+        return os.path.dirname(os.path.realpath(self.marp_path))
+
+    def _is_running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self):
+        self._stop()
+        try:
+            self._process = subprocess.Popen(
+                [self.node_path, SERVER_SCRIPT, self._cli_dir()],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                encoding="utf-8",
+                bufsize=1,
+            )
+            self._lines = queue.Queue()
+            threading.Thread(
+                target=self._read_lines,
+                args=(self._process.stdout, self._lines),
+                daemon=True,
+            ).start()
+            hello = self._read_message(self.START_TIMEOUT)
+        except (OSError, MarpServerError) as e:
+            self._failed_starts += 1
+            self._stop()
+            raise MarpServerError(f"Unable to start Marp worker: {e}")
+
+        if not hello.get("ready"):
+            self._failed_starts += 1
+            self._stop()
+            raise MarpServerError(hello.get("error", "Marp worker not ready"))
+        self._failed_starts = 0
+        self.script = hello.get("script", "")
+
+    def _stop(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+    @staticmethod
+    def _read_lines(stdout, lines):
+        try:
+            for line in stdout:
+                lines.put(line)
+        except (OSError, ValueError):
+            pass
+        lines.put("")
+
+    def _read_message(self, timeout):
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            raise MarpServerTimeout(
+                f"Marp worker did not reply within {timeout} seconds")
+        if not line:
+            raise MarpServerError("Marp worker exited unexpectedly")
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise MarpServerError(f"Malformed reply from Marp worker: {e}")
+
+    def _request(self, markdown_content: str, slides: bool):
+        request_id = self._next_id
+        self._next_id += 1
+        payload = json.dumps(
+            {"id": request_id, "markdown": markdown_content, "slides": slides}
+        )
+        try:
+            self._process.stdin.write(payload + "\n")
+            self._process.stdin.flush()
+        except OSError as e:
+            raise MarpServerError(f"Unable to reach Marp worker: {e}")
+
+        while True:
+            reply = self._read_message(self.REPLY_TIMEOUT)
+            if reply.get("id") == request_id:
+                return reply
+
+    def start(self):
+        """
+        Starts the worker if it is not running yet, so the first render
+        does not pay for the Node.js start. Failures are left for render()
+        to report.
+        """
+        with self._lock:
+            if self._is_running():
+                return
+            try:
+                self._start()
+            except MarpServerError as e:
+                print(e)
+
+    def render(self, markdown_content: str, slides=False):
+        """
+        Renders markdown content and returns a dict with "html" and "css".
+        With slides=True, "html" is a list with one entry per slide.
+        Restarts the worker once if it has crashed.
+        This is a synchronous (blocking) function.
+        """
+        with self._lock:
+            for attempt in range(2):
+                if not self._is_running():
+                    self._start()
+                try:
+                    reply = self._request(markdown_content, slides)
+                    break
+                except MarpServerError as e:
+                    self._stop()
+                    if isinstance(e, MarpServerTimeout):
+                        # A hung worker counts as one that would not start,
+                        # and is not retried: the CLI takes over instead.
+                        self._failed_starts += 1
+                        raise
+                    if attempt:
+                        raise
+
+        if "error" in reply:
+            raise MarpServerError(reply["error"])
+        return reply
+
+    def shutdown(self):
+        """Stops the worker process, if running."""
+        with self._lock:
+            self._stop()
@@ -0,0 +1,131 @@
+# src/core/metrics.py
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Upper bounds, in milliseconds, of the histogram buckets.
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Stages of the edit-to-preview pipeline, in order. "proxy" is the
+# downscaling of a large image, done while the preview loads it.
+STAGES = (
+    "startup", "debounce", "extract", "rewrite", "convert", "handoff",
+    "load", "proxy", "patch",
+)
+
+
+class PreviewMetrics:
+    """
+    Rolling timings of the preview pipeline stages.
+
+    Every stage keeps its last window_size samples, from which percentiles
+    and a histogram are computed on demand. Samples may be recorded from
+    any thread.
+    """
+
+    def __init__(self, window_size=500):
+        self.window_size = window_size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(
+                    maxlen=self.window_size)
+            samples.append(seconds * 1000.0)
+
+    def timer(self, stage: str):
+        """Returns a context manager that records the time spent in it."""
+        return _Timer(self, stage)
+
+    def last(self, stage: str):
+        with self._lock:
+            samples = self._samples.get(stage)
+            return samples[-1] if samples else None
+
+    def percentile(self, stage: str, fraction: float):
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if not samples:
+            return None
+        return samples[min(int(fraction * len(samples)), len(samples) - 1)]
+
+    def summary(self):
+        """Returns per-stage counts, percentiles and histograms, in ms."""
+        with self._lock:
+            snapshot = {
+                stage: sorted(samples)
+                for stage, samples in self._samples.items()
+            }
+        result = {}
+        for stage, samples in snapshot.items():
+            if not samples:
+                continue
+            histogram = {}
+            remaining = iter(samples)
+            pending = next(remaining, None)
+            for bound in HISTOGRAM_BOUNDS_MS + (None,):
+                count = 0
+                while pending is not None and (bound is None or pending <= bound):
+                    count += 1
+                    pending = next(remaining, None)
+                histogram[f"<={bound}" if bound else "inf"] = count
+
+            def pick(fraction):
+                index = min(int(fraction * len(samples)), len(samples) - 1)
+                return round(samples[index], 3)
+
+            result[stage] = {
+                "count": len(samples),
+                "p50_ms": pick(0.50),
+                "p90_ms": pick(0.90),
+                "p99_ms": pick(0.99),
+                "max_ms": round(samples[-1], 3),
+                "histogram": histogram,
+            }
+        return result
+
+    def format_overlay(self):
+        """Returns a short multi-line text with last/p50/p99 per stage."""
+        lines = ["stage       last    p50    p99 (ms)"]
+        for stage in STAGES:
+            last = self.last(stage)
+            if last is None:
+                continue
+            p50 = self.percentile(stage, 0.50)
+            p99 = self.percentile(stage, 0.99)
+            lines.append(f"{stage:<9}{last:7.1f}{p50:7.1f}{p99:7.1f}")
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        """Writes the summary as JSON to path ("-" for stderr)."""
+        data = json.dumps(self.summary(), indent=2)
+        if path == "-":
+            print(data, file=sys.stderr)
+            return
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+        os.replace(tmp_path, path)
+
+
+class _Timer:
+    def __init__(self, metrics: PreviewMetrics, stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.stage, time.monotonic() - self.started)
+        return False
+
+
+# Shared by the converter, the scheduler, the previewer and the window.
+preview_metrics = PreviewMetrics()
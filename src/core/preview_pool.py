@@ -0,0 +1,77 @@
+# src/core/preview_pool.py
+from collections import OrderedDict
+
+
+class PreviewPool:
+    """
+    Lends PresentationPreviewer views to documents.
+
+    At most max_views views exist at once. A document keeps its view while
+    it is in the background, so switching back to a recent tab shows its
+    page as it was; when the pool is full, the least recently used view
+    is taken from its document and reused. trim() drops every view but
+    the active one, e.g. when the system is low on memory.
+
+    WebKit is only loaded when the first view is needed, or when prewarm()
+    is called once the window is up.
+    """
+
+    def __init__(self, max_views=3, on_created=None):
+        self.max_views = max_views
+        self.on_created = on_created
+        # view -> document, least recently used first.
+        self._owners = OrderedDict()
+        self._spare = None
+
+    def _create(self):
+        from .previewer import PresentationPreviewer
+
+        view = PresentationPreviewer()
+        if self.on_created:
+            self.on_created(view)
+        return view
+
+    def prewarm(self):
+        """Creates a view ahead of time if none exists yet."""
+        if not self._owners and self._spare is None:
+            self._spare = self._create()
+
+    def acquire(self, document):
+        """
+        Returns (view, fresh) for document. fresh is True when the view was
+        newly created or taken from another document, so its page has to
+        be restored from document.deck.
+        """
+        view = document.view
+        if view is not None:
+            self._owners.move_to_end(view)
+            return view, False
+
+        if len(self._owners) < self.max_views:
+            view, self._spare = self._spare or self._create(), None
+        else:
+            view, owner = self._owners.popitem(last=False)
+            owner.view = None
+        document.view = view
+        self._owners[view] = document
+        return view, True
+
+    def release(self, document):
+        """Takes back document's view, if it has one, and drops it."""
+        view = document.view
+        if view is None:
+            return
+        document.view = None
+        del self._owners[view]
+        # Its document's folders are no longer served.
+        view.set_base_folder(None)
+        parent = view.get_parent()
+        if parent is not None and hasattr(parent, "set_child"):
+            parent.set_child(None)
+
+    def trim(self, keep=None):
+        """Drops the views of every document except keep."""
+        self._spare = None
+        for document in list(self._owners.values()):
+            if document is not keep:
+                self.release(document)
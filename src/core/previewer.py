@@ -18,13 +18,81 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 
-from gi.repository import Gio, GLib, WebKit
+import json
+import time
+
 import gi
 gi.require_version("WebKit", "6.0")
+from gi.repository import Gio, GLib, GObject, WebKit  # noqa: E402
+
+from .asset_server import AssetServer
+from .image_proxy import ImageProxy, proxy_size
+from .metrics import preview_metrics
+
+DEFAULT_BASE_URI = "marp://preview/"
+
+# Replaces `count` slides starting at `start` inside the Marp container
+# with the given slide markup, leaving the rest of the page untouched.
+PATCH_SCRIPT = """
+(function (start, count, slides) {
+  const root = document.querySelector('div.marpit');
+  if (!root) throw new Error('No Marp container');
+  for (let i = 0; i < count; i++) root.children[start].remove();
+  const template = document.createElement('template');
+  template.innerHTML = slides.join('');
+  root.insertBefore(template.content, root.children[start] || null);
+})(%s, %s, %s);
+"""
+
+
+# Shared by every preview view; the marp scheme can only be registered
+# once per web context.
+_asset_server = None
+
+
+def register_scheme():
+    """Registers the marp scheme, once, and returns its asset server."""
+    global _asset_server
+    if _asset_server is None:
+        _asset_server = AssetServer(image_proxy=ImageProxy())
+        WebKit.WebContext.get_default().register_uri_scheme(
+            "marp", _on_uri_scheme_request, None)
+    return _asset_server
+
+
+def _on_uri_scheme_request(request: WebKit.URISchemeRequest, user_data=None):
+    uri = request.get_uri()
+    if _asset_server.handles(uri):
+        _asset_server.serve(request)
+    elif uri.startswith("marp://preview"):
+        stream = Gio.MemoryInputStream.new_from_data(b"")
+        request.finish(stream, 0, None)
+    else:
+        error = GLib.Error(
+            WebKit.URI_SCHEME_ERROR,
+            WebKit.URI_SCHEME_ERROR.FAILED,
+            f"Unsupported URI: {uri}",
+        )
+        request.finish_error(error)
+
+
+# Scrolls the given slide of the Marp container into view.
+SCROLL_SCRIPT = """
+(function (index) {
+  const root = document.querySelector('div.marpit');
+  if (!root || !root.children.length) return;
+  const slide = root.children[Math.min(index, root.children.length - 1)];
+  slide.scrollIntoView({ block: 'start' });
+})(%d);
+"""
 
 
 class PresentationPreviewer(WebKit.WebView):
     __gtype_name__ = "PresentationPreviewer"
+    __gsignals__ = {
+        # Emitted once a new document has loaded or a patch was applied.
+        "preview-updated": (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -33,26 +101,116 @@ class PresentationPreviewer(WebKit.WebView):
         self.get_settings().set_enable_javascript(True)
         self.get_settings().set_enable_media(False)
 
-        web_context = WebKit.WebContext.get_default()
+        # The deck currently shown, when the page can be patched in place.
+        self._deck = None
+        self.base_uri = DEFAULT_BASE_URI
+        self._load_started = None
+        # The slide to keep in view, reapplied after every page load.
+        self._slide = None
+        self.connect("load-changed", self._on_load_changed)
+        self.asset_server = register_scheme()
 
-        web_context.register_uri_scheme(
-            "marp",
-            self._on_uri_scheme_request,
-            None,
-        )
+    def do_size_allocate(self, width, height, baseline):
+        WebKit.WebView.do_size_allocate(self, width, height, baseline)
+        # Images are never shown sharper than the pane allows, so the asset
+        # server can hand out proxies of about that size.
+        self.asset_server.image_size = proxy_size(
+            width, self.get_scale_factor())
 
-    def _on_uri_scheme_request(self, request: WebKit.URISchemeRequest, user_data=None):
-        uri = request.get_uri()
-        if uri.startswith("marp://preview"):
-            stream = Gio.MemoryInputStream.new_from_data(b"")
-            request.finish(stream, 0, None)
-        else:
-            error = GLib.Error(
-                WebKit.URI_SCHEME_ERROR,
-                WebKit.URI_SCHEME_ERROR.FAILED,
-                f"Unsupported URI: {uri}",
-            )
-            request.finish_error(error)
+    def set_base_folder(self, folder, workspace=None):
+        """
+        Sets the folder that relative asset paths resolve against; assets
+        may also come from below workspace. The change applies to the
+        next full page load. None stops serving the previous folders.
+        """
+        base_uri = (
+            self.asset_server.base_uri(folder, workspace) or DEFAULT_BASE_URI)
+        self.asset_server.release(self.base_uri)
+        if base_uri != self.base_uri:
+            self.base_uri = base_uri
+            self._deck = None
 
     def load_marp_html(self, html_content):
-        self.load_html(html_content, "marp://preview/")
+        self._deck = None
+        self._load_started = time.monotonic()
+        self.load_html(html_content, self.base_uri)
+
+    def _on_load_changed(self, web_view, load_event):
+        if (load_event == WebKit.LoadEvent.FINISHED
+                and self._load_started is not None):
+            preview_metrics.record(
+                "load", time.monotonic() - self._load_started)
+            self._load_started = None
+            if self._slide is not None:
+                self._run_scroll()
+            self.emit("preview-updated")
+
+    def show_deck(self, deck):
+        """
+        Shows a converted deck. When the page on screen was built from the
+        same CSS, only the slides that changed are replaced in place, which
+        keeps the scroll position and avoids re-decoding images.
+        """
+        old_deck = self._deck
+        if old_deck is not None and deck["html"] == old_deck["html"]:
+            # e.g. a fresh render matching the cached one already shown.
+            return
+        if (
+            old_deck is None
+            or deck["slides"] is None
+            or deck["css"] != old_deck["css"]
+            or self.is_loading()
+        ):
+            self.load_marp_html(deck["html"])
+            self._deck = deck
+            return
+
+        # Replace only the range between the unchanged head and tail.
+        old_slides = old_deck["slides"]
+        new_slides = deck["slides"]
+        start = 0
+        limit = min(len(old_slides), len(new_slides))
+        while start < limit and old_slides[start] == new_slides[start]:
+            start += 1
+        end = 0
+        while (
+            end < limit - start
+            and old_slides[-1 - end] == new_slides[-1 - end]
+        ):
+            end += 1
+
+        self._deck = deck
+        changed = new_slides[start:len(new_slides) - end]
+        removed = len(old_slides) - end - start
+        if not changed and not removed:
+            return
+
+        script = PATCH_SCRIPT % (start, removed, json.dumps(changed))
+        self.evaluate_javascript(
+            script, -1, None, None, None, self._on_patch_finished,
+            time.monotonic())
+
+    def scroll_to_slide(self, index: int):
+        """Scrolls the preview to a slide without reloading the page."""
+        if index == self._slide:
+            return
+        self._slide = index
+        if not self.is_loading():
+            self._run_scroll()
+
+    def _run_scroll(self):
+        self.evaluate_javascript(
+            SCROLL_SCRIPT % self._slide, -1, None, None, None, None, None)
+
+    def _on_patch_finished(self, web_view, result, started):
+        try:
+            self.evaluate_javascript_finish(result)
+            preview_metrics.record("patch", time.monotonic() - started)
+            self.emit("preview-updated")
+        except GLib.Error as e:
+            # The page is not what we expected; reload the latest deck.
+            print(f"Preview patch failed, reloading: {e.message}")
+            deck = self._deck
+            if deck is not None:
+                self.load_marp_html(deck["html"])
+                self._deck = deck
@@ -0,0 +1,155 @@
+# src/core/render_cache.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from gi.repository import GLib
+
+# Bump when the layout of stored decks changes.
+CACHE_VERSION = 1
+# Renders are written to disk once a document has been left alone this long.
+WRITE_DELAY_MS = 2000
+
+
+def content_hash(markdown_content: str):
+    return hashlib.blake2b(
+        markdown_content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RenderCache:
+    """
+    The last rendered deck of each document, so reopening a file can show
+    its preview before the fresh render finishes.
+
+    Entries are keyed by file path and only returned when the content hash
+    and converter options still match. The most recent documents are kept
+    in memory; every entry is also written, after a short delay, as one
+    JSON file per document under $XDG_CACHE_HOME/presentat/render, which
+    is pruned to max_disk_bytes. Disk access happens on background
+    threads and results are delivered on the main loop.
+    """
+
+    def __init__(self, directory=None, max_entries=16,
+                 max_disk_bytes=128 * 1024 * 1024):
+        self.directory = directory or os.path.join(
+            GLib.get_user_cache_dir(), "presentat", "render")
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._unwritten = {}
+        self._write_id = None
+        self._lock = threading.Lock()
+
+    def _file_name(self, path: str):
+        digest = hashlib.blake2b(path.encode("utf-8"), digest_size=16)
+        return os.path.join(self.directory, digest.hexdigest() + ".json")
+
+    def lookup(self, path: str, digest: str, options: str, callback):
+        """
+        Finds the deck rendered for path with this content hash and these
+        options. callback(deck) is called on the main loop, with None on a
+        miss; memory hits are answered immediately.
+        """
+        entry = self._entries.get(path)
+        if entry is not None:
+            self._entries.move_to_end(path)
+            callback(entry["deck"] if self._matches(entry, digest, options)
+                     else None)
+            return
+
+        def run():
+            entry = self._read(path)
+            GLib.idle_add(on_read, entry)
+
+        def on_read(entry):
+            if entry is not None and path not in self._entries:
+                self._remember(path, entry)
+            hit = entry is not None and self._matches(entry, digest, options)
+            callback(entry["deck"] if hit else None)
+            return False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def store(self, path: str, digest: str, options: str, deck):
+        """Remembers a rendered deck and schedules writing it to disk."""
+        entry = {
+            "version": CACHE_VERSION,
+            "path": path,
+            "hash": digest,
+            "options": options,
+            "deck": deck,
+        }
+        self._remember(path, entry)
+        self._unwritten[path] = entry
+        if self._write_id is not None:
+            GLib.source_remove(self._write_id)
+        self._write_id = GLib.timeout_add(WRITE_DELAY_MS, self._write_async)
+
+    def flush(self):
+        """Writes pending entries now, blocking; used when closing."""
+        if self._write_id is not None:
+            GLib.source_remove(self._write_id)
+            self._write_id = None
+        entries, self._unwritten = list(self._unwritten.values()), {}
+        self._write(entries)
+
+    def _matches(self, entry, digest: str, options: str):
+        return (
+            entry.get("version") == CACHE_VERSION
+            and entry.get("hash") == digest
+            and entry.get("options") == options
+        )
+
+    def _remember(self, path: str, entry):
+        self._entries[path] = entry
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _write_async(self):
+        self._write_id = None
+        entries, self._unwritten = list(self._unwritten.values()), {}
+        threading.Thread(
+            target=self._write, args=(entries,), daemon=True).start()
+        return False
+
+    def _read(self, path: str):
+        try:
+            with open(self._file_name(path), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("path") == path else None
+
+    def _write(self, entries):
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                for entry in entries:
+                    file_name = self._file_name(entry["path"])
+                    tmp_name = file_name + ".tmp"
+                    with open(tmp_name, "w", encoding="utf-8") as f:
+                        json.dump(entry, f)
+                    os.replace(tmp_name, file_name)
+                self._prune()
+            except OSError as e:
+                print(f"Unable to write render cache: {e}")
+
+    def _prune(self):
+        """Deletes the least recently written files over max_disk_bytes."""
+        files = []
+        total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        files.sort()
+        for _mtime, size, file_name in files:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(file_name)
+            total -= size
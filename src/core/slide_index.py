@@ -0,0 +1,56 @@
+# src/core/slide_index.py
+import bisect
+
+
+class SlideIndex:
+    """
+    Maps editor lines to slides through the sorted list of the lines at
+    which slides start, so lookups are a binary search.
+
+    The list comes from each render (see slide_start_lines()). Between
+    renders it is kept roughly in place by shifting it on every buffer
+    edit, without looking at the text; the next render makes it exact
+    again.
+    """
+
+    def __init__(self, starts=None):
+        self.starts = starts or [0]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def reset(self, starts):
+        self.starts = starts or [0]
+
+    def slide_at(self, line: int):
+        """Returns the index of the slide containing line."""
+        return max(bisect.bisect_right(self.starts, line) - 1, 0)
+
+    def start_line(self, slide: int):
+        """Returns the first line of a slide."""
+        return self.starts[min(max(slide, 0), len(self.starts) - 1)]
+
+    def lines_inserted(self, line: int, count: int):
+        """Notes that count lines were inserted after the start of line."""
+        if count <= 0:
+            return
+        starts = self.starts
+        for i in range(bisect.bisect_right(starts, line), len(starts)):
+            starts[i] += count
+
+    def lines_deleted(self, first: int, last: int):
+        """
+        Notes that the text from line first to line last was deleted,
+        joining the two lines. Slides starting in between are dropped
+        until the next render.
+        """
+        if last <= first:
+            return
+        starts = self.starts
+        low = bisect.bisect_right(starts, first)
+        high = bisect.bisect_right(starts, last)
+        del starts[low:high]
+        for i in range(low, len(starts)):
+            starts[i] -= last - first
+        if not starts:
+            starts.append(0)
@@ -0,0 +1,172 @@
+# src/core/slide_navigator.py
+import hashlib
+import re
+
+from gi.repository import Gio, GObject, Gtk
+
+THUMBNAIL_WIDTH = 192
+THUMBNAIL_HEIGHT = 108
+
+# Slide anchors change whenever a slide moves but are not visible, so they
+# are left out of thumbnail keys; page numbers are kept.
+SLIDE_ID_ATTR = re.compile(r'(?<![\w-])id="\d+"')
+
+
+def thumbnail_key(slide_html: str, css_digest: str):
+    """Returns the key of a slide's thumbnail."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(css_digest.encode("ascii"))
+    digest.update(SLIDE_ID_ATTR.sub("", slide_html).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SlideItem(GObject.Object):
+    """A row of the navigator: one rendered slide and its thumbnail key."""
+
+    def __init__(self, key: str, html: str, css: str, base_uri, **kwargs):
+        super().__init__(**kwargs)
+        self.key = key
+        self.html = html
+        self.css = css
+        self.base_uri = base_uri
+
+
+class SlideNavigator(Gtk.Overlay):
+    """
+    A strip of slide thumbnails.
+
+    Rows are recycled by a Gtk.ListView, so only the slides in view have
+    widgets, and only those ask the ThumbnailRenderer for a thumbnail.
+    When a new deck arrives, only the rows between the unchanged head and
+    tail of the deck are replaced; the others keep their thumbnails.
+
+    WebKit is loaded with the first deck that has slides.
+    """
+
+    __gtype_name__ = "SlideNavigator"
+    __gsignals__ = {
+        # Emitted with the index of the slide the user clicked.
+        "slide-activated": (GObject.SignalFlags.RUN_FIRST, None, (int,)),
+    }
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.renderer = None
+        # list item -> (key, callback) of rows waiting for a thumbnail.
+        self._waiting = {}
+        self.store = Gio.ListStore.new(SlideItem)
+        self.selection = Gtk.SingleSelection(
+            model=self.store, autoselect=False, can_unselect=True)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._factory_setup)
+        factory.connect("bind", self._factory_bind)
+        factory.connect("unbind", self._factory_unbind)
+        self.list_view = Gtk.ListView(
+            model=self.selection, factory=factory, single_click_activate=True)
+        self.list_view.add_css_class("navigation-sidebar")
+        self.list_view.connect("activate", self._on_activate)
+
+        scrolled_window = Gtk.ScrolledWindow(
+            child=self.list_view, vexpand=True,
+            hscrollbar_policy=Gtk.PolicyType.NEVER)
+        self.set_child(scrolled_window)
+        self.set_visible(False)
+
+    def set_deck(self, deck, base_uri=None):
+        """
+        Shows the slides of a rendered deck, or none for None. base_uri is
+        the page base its relative image paths resolve against.
+        """
+        slides = deck.get("slides") if deck else None
+        if not slides:
+            self.store.remove_all()
+            self.set_visible(False)
+            return
+        if self.renderer is None:
+            from .slide_thumbnails import ThumbnailRenderer
+
+            self.renderer = ThumbnailRenderer()
+            self.add_overlay(self.renderer.view)
+
+        css = deck["css"] or ""
+        # The same slide shows other images when its deck moves folder.
+        css_digest = hashlib.blake2b(
+            f"{base_uri}\0{css}".encode("utf-8"), digest_size=16).hexdigest()
+        keys = [thumbnail_key(slide, css_digest) for slide in slides]
+
+        count = self.store.get_n_items()
+        start = 0
+        limit = min(count, len(keys))
+        while start < limit and self.store.get_item(start).key == keys[start]:
+            start += 1
+        end = 0
+        while (
+            end < limit - start
+            and self.store.get_item(count - 1 - end).key == keys[-1 - end]
+        ):
+            end += 1
+
+        items = [
+            SlideItem(key, slide, css, base_uri)
+            for key, slide in zip(keys[start:len(keys) - end],
+                                  slides[start:len(slides) - end])
+        ]
+        if items or count - end - start:
+            self.store.splice(start, count - end - start, items)
+        self.set_visible(True)
+
+    def select(self, index: int):
+        """Highlights a slide and scrolls it into view."""
+        if index >= self.store.get_n_items():
+            return
+        if self.selection.get_selected() != index:
+            self.list_view.scroll_to(index, Gtk.ListScrollFlags.SELECT, None)
+
+    def _factory_setup(self, factory, list_item: Gtk.ListItem):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=4,
+                      margin_top=6, margin_bottom=6)
+        picture = Gtk.Picture(content_fit=Gtk.ContentFit.CONTAIN)
+        picture.set_size_request(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT)
+        picture.add_css_class("card")
+        label = Gtk.Label()
+        label.add_css_class("caption")
+        label.add_css_class("numeric")
+        box.append(picture)
+        box.append(label)
+        list_item.set_child(box)
+        # Rows keep their item when slides are inserted before them.
+        list_item.connect("notify::position", self._on_position_changed)
+
+    def _factory_bind(self, factory, list_item: Gtk.ListItem):
+        item: SlideItem = list_item.get_item()
+        box: Gtk.Box = list_item.get_child()
+        picture: Gtk.Picture = box.get_first_child()
+        self._on_position_changed(list_item, None)
+
+        def on_rendered(key, texture):
+            if self._waiting.get(list_item, (None, None))[1] is on_rendered:
+                del self._waiting[list_item]
+                picture.set_paintable(texture)
+
+        texture = self.renderer.lookup(item.key)
+        picture.set_paintable(texture)
+        if texture is None:
+            self._waiting[list_item] = (item.key, on_rendered)
+            self.renderer.request(
+                item.key, item.html, item.css, item.base_uri, on_rendered)
+
+    def _factory_unbind(self, factory, list_item: Gtk.ListItem):
+        waiting = self._waiting.pop(list_item, None)
+        if waiting is not None:
+            # Scrolled out of view before its thumbnail was rendered.
+            self.renderer.cancel(*waiting)
+
+    def _on_position_changed(self, list_item: Gtk.ListItem, pspec):
+        box = list_item.get_child()
+        position = list_item.get_position()
+        if box is not None and position != Gtk.INVALID_LIST_POSITION:
+            box.get_last_child().set_text(str(position + 1))
+
+    def _on_activate(self, list_view, position: int):
+        self.emit("slide-activated", position)
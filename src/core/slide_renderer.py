@@ -0,0 +1,277 @@
+# src/core/slide_renderer.py
+import hashlib
+import re
+from collections import OrderedDict
+
+FRONT_MATTER = re.compile(r"\A---[ \t]*\n(.*?\n)?---[ \t]*(?:\n|\Z)", re.DOTALL)
+SEPARATOR = re.compile(r"^ {0,3}(?:-{3,}|\*{3,}|_{3,})[ \t]*$")
+FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+# Lines that start a block other than a paragraph (an ATX heading, HTML),
+# a list item or blockquote, and the underline of a setext heading.
+BLOCK_START = re.compile(r"^ {0,3}(?:#{1,6}(?:[ \t]|$)|<)")
+CONTAINER_START = re.compile(
+    r"^ {0,3}(?:>|(?:[-*+]|(\d{1,9})[.)])(?=[ \t]|$))")
+SETEXT_UNDERLINE = re.compile(r"^ {0,3}(?:=+|-+)[ \t]*$")
+COMMENT = re.compile(r"<!--(.*?)-->", re.DOTALL)
+DIRECTIVE_KEY = re.compile(r"^\s*(_?)([A-Za-z][\w-]*)\s*:")
+SECTION_TAG = re.compile(r"<section\b[^>]*>")
+SLIDE_NUMBER_ATTRS = re.compile(r'(?<![\w-])(id|data-marpit-pagination)="\d+"')
+SLIDE_TOTAL_ATTR = re.compile(r'(?<![\w-])data-marpit-pagination-total="\d+"')
+
+# Directives that apply to the whole deck wherever they are written.
+GLOBAL_DIRECTIVES = {
+    "theme", "style", "headingDivider", "lang", "math", "size", "marp",
+    "title", "description", "author", "image", "keywords", "url",
+}
+# Directives that apply to their slide and every slide after it.
+LOCAL_DIRECTIVES = {
+    "paginate", "header", "footer", "class", "backgroundColor",
+    "backgroundImage", "backgroundPosition", "backgroundRepeat",
+    "backgroundSize", "color", "transition",
+}
+
+
+def _digest(text: str):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _split_front_matter(markdown_content: str):
+    """Returns (front_matter, body, line at which body starts)."""
+    match = FRONT_MATTER.match(markdown_content)
+    if not match:
+        return "", markdown_content, 0
+    return (
+        match.group(1) or "",
+        markdown_content[match.end():],
+        match.group(0).count("\n"),
+    )
+
+
+def _slide_chunks(body: str, start: int):
+    """
+    Yields (start_line, source) for every slide of a deck's body, with
+    0-based line numbers counted from start. Separators inside fenced code
+    blocks, and `---` lines that underline a setext heading, are not
+    treated as slide breaks.
+    """
+    current = []
+    fence = None
+    paragraph = None
+    for number, line in enumerate(body.split("\n"), start):
+        fence_match = FENCE.match(line)
+        if fence is not None:
+            if fence_match and fence_match.group(1).startswith(fence):
+                fence = None
+        elif fence_match:
+            fence = fence_match.group(1)
+            paragraph = None
+        elif SEPARATOR.match(line):
+            if paragraph != _PARAGRAPH or not line.lstrip().startswith("-"):
+                yield start, "\n".join(current)
+                start = number + 1
+                current = []
+                paragraph = None
+                continue
+            paragraph = None  # The underline of a setext heading.
+        else:
+            paragraph = _paragraph_after(line, paragraph)
+        current.append(line)
+    yield start, "\n".join(current)
+
+
+def split_deck(markdown_content: str):
+    """Splits a Marp deck into its front matter and a list of slide sources."""
+    front_matter, body, start = _split_front_matter(markdown_content)
+    slides = [source for _start, source in _slide_chunks(body, start)]
+    return front_matter, slides
+
+
+def slide_start_lines(markdown_content: str):
+    """
+    Returns the 0-based line number at which each slide of a deck starts,
+    for the slides split_deck() returns.
+    """
+    _front_matter, body, start = _split_front_matter(markdown_content)
+    return [start for start, _source in _slide_chunks(body, start)]
+
+
+# What a `---` line would follow: a top-level paragraph, which it turns
+# into a setext heading, or a paragraph in a list item or blockquote (or
+# blank lines within one), which it cannot continue, so CommonMark ends
+# the list or blockquote with a break instead.
+_PARAGRAPH = "paragraph"
+_NESTED = "nested"
+_NESTED_GAP = "nested-gap"
+
+
+def _paragraph_after(line: str, paragraph):
+    """Returns the paragraph state after a line that is not a separator."""
+    if not line.strip():
+        return _NESTED_GAP if paragraph in (_NESTED, _NESTED_GAP) else None
+    if paragraph == _NESTED_GAP:
+        if line.startswith(("  ", "\t")):
+            return _NESTED  # More content of the list item.
+        paragraph = None
+    if paragraph == _PARAGRAPH and SETEXT_UNDERLINE.match(line):
+        return None
+    if BLOCK_START.match(line):
+        return None
+    match = CONTAINER_START.match(line)
+    if match:
+        quote = match.group(0).lstrip().startswith(">")
+        empty = not line[match.end():].strip()
+        # Only a non-empty bullet or "1." item can interrupt a paragraph.
+        if (quote or paragraph is None
+                or not empty and match.group(1) in (None, "1")):
+            return _NESTED
+        return paragraph
+    if paragraph is None and line.startswith(("    ", "\t")):
+        return None  # Indented code.
+    # A new paragraph, or a continuation, lazily so in a nested one.
+    return paragraph or _PARAGRAPH
+
+
+def _directives(slide: str):
+    """
+    Returns the (global, inherited) directive lines written in a slide's
+    HTML comments. Spot directives (prefixed with "_") only affect their
+    own slide and are not inherited.
+    """
+    global_lines = []
+    inherited_lines = []
+    for comment in COMMENT.findall(slide):
+        target = None
+        for line in comment.split("\n"):
+            match = DIRECTIVE_KEY.match(line)
+            if match:
+                spot, key = match.groups()
+                if key in GLOBAL_DIRECTIVES:
+                    target = global_lines
+                elif key in LOCAL_DIRECTIVES and not spot:
+                    target = inherited_lines
+                else:
+                    target = None
+            elif not line.strip() or line[0] not in " \t":
+                target = None
+            if target is not None:
+                target.append(line)
+    return global_lines, inherited_lines
+
+
+def _as_comment(lines):
+    return "<!--\n" + "\n".join(lines) + "\n-->\n\n" if lines else ""
+
+
+def _renumber(slide_html: str, index: int, total: int):
+    """Rewrites the slide number attributes for the slide's final position."""
+    def fix(match):
+        tag = SLIDE_NUMBER_ATTRS.sub(rf'\1="{index + 1}"', match.group(0))
+        return SLIDE_TOTAL_ATTR.sub(
+            f'data-marpit-pagination-total="{total}"', tag)
+
+    return SECTION_TAG.sub(fix, slide_html)
+
+
+class SlideRenderer:
+    """
+    Renders a deck slide by slide through a MarpServer, caching each
+    rendered slide in an LRU keyed by (deck hash, slide hash).
+
+    The deck hash covers the front matter and every global directive; the
+    slide hash covers the slide source and the local directives it inherits
+    from earlier slides. Only slides missing from the cache are sent to the
+    worker, in a single batch.
+    """
+
+    def __init__(self, server, max_slides=4096, max_decks=32, max_styles=4):
+        self.server = server
+        self.max_slides = max_slides
+        self.max_decks = max_decks
+        self.max_styles = max_styles
+        self._slides = OrderedDict()
+        self._styles = OrderedDict()
+
+    def clear(self):
+        self._slides.clear()
+        self._styles.clear()
+
+    def render(self, markdown_content: str):
+        """
+        Returns (slides, css_chunks) for the deck, where slides is a list of
+        rendered slide HTML in deck order.
+        Raises MarpServerError if the worker fails.
+        """
+        front_matter, sources = split_deck(markdown_content)
+
+        global_lines = []
+        contexts = []
+        inherited = []
+        for source in sources:
+            slide_globals, slide_inherited = _directives(source)
+            global_lines.extend(slide_globals)
+            contexts.append(list(inherited))
+            inherited.extend(slide_inherited)
+
+        deck_prefix = (
+            f"---\n{front_matter}---\n\n" if front_matter else ""
+        ) + _as_comment(global_lines)
+
+        if "headingDivider" in deck_prefix or any(
+                "<style" in source for source in sources):
+            # Heading dividers add slides we cannot map back, and inline
+            # styles produce deck-wide CSS; render those decks as a whole.
+            return self._render_whole(markdown_content)
+
+        deck_key = _digest(deck_prefix)
+        keys = [
+            (deck_key, _digest(_as_comment(context) + source))
+            for context, source in zip(contexts, sources)
+        ]
+
+        batch = {}
+        for i, key in enumerate(keys):
+            if key not in self._slides and key not in batch:
+                batch[key] = _as_comment(contexts[i]) + sources[i]
+        if not batch and deck_key not in self._styles:
+            # The deck's CSS was evicted; re-render one slide to get it back.
+            batch[keys[0]] = _as_comment(contexts[0]) + sources[0]
+
+        rendered = {}
+        if batch:
+            markdown = deck_prefix + "\n\n---\n\n".join(batch.values())
+            result = self.server.render(markdown, slides=True)
+            if len(result["html"]) != len(batch):
+                # Our split disagreed with Marp's; don't cache anything.
+                return self._render_whole(markdown_content)
+            rendered = dict(zip(batch, result["html"]))
+            self._add_style(deck_key, result["css"])
+
+        slides = []
+        for i, key in enumerate(keys):
+            slide_html = rendered.get(key)
+            if slide_html is None:
+                slide_html = self._slides[key]
+                self._slides.move_to_end(key)
+            slides.append(_renumber(slide_html, i, len(keys)))
+        for key, slide_html in rendered.items():
+            self._store(self._slides, key, slide_html, self.max_slides)
+        self._styles.move_to_end(deck_key)
+        return slides, self._styles[deck_key]
+
+    def _render_whole(self, markdown_content: str):
+        result = self.server.render(markdown_content, slides=True)
+        return result["html"], [result["css"]]
+
+    def _add_style(self, deck_key, css: str):
+        # Batches can yield different CSS (e.g. math styles only appear when
+        # a rendered slide uses math), so keep the distinct chunks per deck.
+        styles = self._styles.get(deck_key, [])
+        if css not in styles:
+            styles = (styles + [css])[-self.max_styles:]
+        self._store(self._styles, deck_key, styles, self.max_decks)
+
+    def _store(self, cache, key, value, limit):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
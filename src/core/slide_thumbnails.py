@@ -0,0 +1,151 @@
+# src/core/slide_thumbnails.py
+from collections import OrderedDict
+
+import gi
+gi.require_version("WebKit", "6.0")
+from gi.repository import GLib, Gtk, WebKit  # noqa: E402
+
+from .previewer import DEFAULT_BASE_URI, register_scheme  # noqa: E402
+from .slide_navigator import THUMBNAIL_HEIGHT, THUMBNAIL_WIDTH  # noqa: E402
+
+# Fits a single slide to the viewport; Marp's SVG wrapper letterboxes
+# slides of other aspect ratios.
+THUMBNAIL_STYLE = """
+html, body { margin: 0; overflow: hidden; background: #3d3d3d; }
+div.marpit > svg[data-marpit-svg] {
+  display: block;
+  width: 100vw;
+  height: 100vh;
+}
+"""
+
+
+class ThumbnailRenderer:
+    """
+    Renders slide thumbnails one at a time in a single small WebView.
+
+    Requests are keyed by a hash of the slide and its CSS. Finished
+    thumbnails are kept as Gdk.Textures in an LRU, so a slide that did not
+    change is never rendered twice. Pending requests are served newest
+    first, which favours the rows just scrolled into view, and are dropped
+    once nobody waits for them.
+
+    The view has to be inside a mapped window for WebKit to paint it; put
+    view somewhere hidden from sight, e.g. a transparent overlay.
+    """
+
+    def __init__(self, max_textures=256):
+        self.max_textures = max_textures
+        self._textures = OrderedDict()
+        # key -> (document, base_uri, callbacks), oldest first.
+        self._queue = OrderedDict()
+        self._current = None
+        self._failed = False
+
+        register_scheme()
+        self.view = WebKit.WebView()
+        self.view.get_settings().set_enable_javascript(False)
+        self.view.get_settings().set_enable_media(False)
+        self.view.set_size_request(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT)
+        # Overlay children fill the overlay by default; pinned to a corner
+        # the view gets its requested size, which the snapshots capture.
+        self.view.set_halign(Gtk.Align.START)
+        self.view.set_valign(Gtk.Align.START)
+        self.view.set_opacity(0)
+        self.view.set_can_target(False)
+        self.view.set_can_focus(False)
+        self.view.connect("load-changed", self._on_load_changed)
+        self.view.connect("load-failed", self._on_load_failed)
+
+    def lookup(self, key):
+        """Returns the cached thumbnail for key, or None."""
+        texture = self._textures.get(key)
+        if texture is not None:
+            self._textures.move_to_end(key)
+        return texture
+
+    def request(self, key, slide_html: str, css: str, base_uri, callback):
+        """
+        Renders a slide, loaded with base_uri as its base, unless cached;
+        callback(key, texture) follows.
+        """
+        texture = self.lookup(key)
+        if texture is not None:
+            callback(key, texture)
+            return
+        if self._current is not None and self._current[0] == key:
+            self._current[2].append(callback)
+            return
+        entry = self._queue.pop(key, None)
+        if entry is None:
+            document = (
+                "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+                f"<style>{css}</style><style>{THUMBNAIL_STYLE}</style>"
+                f"</head><body><div class=\"marpit\">{slide_html}</div>"
+                "</body></html>"
+            )
+            entry = (document, base_uri or DEFAULT_BASE_URI, [])
+        entry[2].append(callback)
+        self._queue[key] = entry
+        self._next()
+
+    def cancel(self, key, callback):
+        """Stops waiting for key on behalf of callback."""
+        entry = self._queue.get(key)
+        if entry is None:
+            return
+        if callback in entry[2]:
+            entry[2].remove(callback)
+        if not entry[2]:
+            del self._queue[key]
+
+    def clear(self):
+        self._textures.clear()
+        self._queue.clear()
+
+    def _next(self):
+        if self._current is not None or not self._queue:
+            return
+        key, (document, base_uri, callbacks) = self._queue.popitem(last=True)
+        self._current = (key, document, callbacks)
+        self._failed = False
+        self.view.load_html(document, base_uri)
+
+    def _on_load_changed(self, view, load_event):
+        if load_event != WebKit.LoadEvent.FINISHED or self._current is None:
+            return
+        if self._failed:
+            # Already reported by _on_load_failed(); move on.
+            self._current = None
+            self._next()
+            return
+        self.view.get_snapshot(
+            WebKit.SnapshotRegion.VISIBLE,
+            WebKit.SnapshotOptions.NONE,
+            None,
+            self._on_snapshot_ready,
+            self._current,
+        )
+
+    def _on_load_failed(self, view, load_event, uri, error):
+        print(f"Unable to render slide thumbnail: {error.message}")
+        # FINISHED follows, which moves on to the next slide.
+        self._failed = True
+        return True
+
+    def _on_snapshot_ready(self, view, result, current):
+        key, _document, callbacks = current
+        if current is not self._current:
+            return
+        self._current = None
+        try:
+            texture = view.get_snapshot_finish(result)
+        except GLib.Error as e:
+            print(f"Unable to render slide thumbnail: {e.message}")
+        else:
+            self._textures[key] = texture
+            while len(self._textures) > self.max_textures:
+                self._textures.popitem(last=False)
+            for callback in callbacks:
+                callback(key, texture)
+        self._next()
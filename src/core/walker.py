@@ -0,0 +1,151 @@
+# src/core/walker.py
+import os
+import re
+
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
+# Directories that are never indexed, whatever the .gitignore files say.
+ALWAYS_IGNORED = {".git", ".hg", ".svn", "node_modules"}
+
+
+def _glob_to_regex(pattern: str):
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+            continue
+        if c == "*":
+            regex += "[^/]*"
+        elif c == "?":
+            regex += "[^/]"
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(c)
+            else:
+                regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+                i = end
+        else:
+            regex += re.escape(c)
+        i += 1
+    return regex
+
+
+class IgnoreRules:
+    """The compiled rules of a single .gitignore file."""
+
+    def __init__(self, lines):
+        self.rules = []
+        for line in lines:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            if "/" in line:
+                regex = _glob_to_regex(line.lstrip("/"))
+            else:
+                regex = "(?:.*/)?" + _glob_to_regex(line)
+            self.rules.append((re.compile(regex + r"\Z"), negate, dir_only))
+
+    @classmethod
+    def load(cls, directory: str):
+        try:
+            with open(os.path.join(directory, ".gitignore"),
+                      encoding="utf-8", errors="replace") as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+
+    def match(self, rel_path: str, is_dir: bool):
+        """Returns True (ignored), False (re-included) or None (no rule)."""
+        result = None
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+def is_ignored(rules, rel_path: str, is_dir: bool):
+    """
+    rules maps a directory (relative to the root, "" for the root) to its
+    IgnoreRules. Deeper .gitignore files take precedence.
+    """
+    ignored = False
+    directory = ""
+    parts = rel_path.split("/")
+    for depth in range(len(parts)):
+        rule_set = rules.get(directory)
+        if rule_set is not None:
+            sub_path = "/".join(parts[depth:])
+            result = rule_set.match(sub_path, is_dir)
+            if result is not None:
+                ignored = result
+        directory = "/".join(parts[:depth + 1])
+    return ignored
+
+
+def scan(root: str, start: str = "", rules=None,
+         extensions=MARKDOWN_EXTENSIONS, skip_extensions=()):
+    """
+    Walks root (or its subdirectory start), yielding (rel_path, is_dir)
+    for every directory and every file with one of extensions (any file
+    when None), and none of skip_extensions, that is not ignored. The
+    .gitignore rules found on the way are added to rules as the walk
+    reaches them.
+    """
+    rules = {} if rules is None else rules
+    stack = [start]
+    while stack:
+        rel_dir = stack.pop()
+        abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+        rule_set = IgnoreRules.load(abs_dir)
+        if rule_set is not None:
+            rules[rel_dir] = rule_set
+        yield rel_dir, True
+        try:
+            entries = list(os.scandir(abs_dir))
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if (entry.name not in ALWAYS_IGNORED
+                        and not is_ignored(rules, rel_path, True)):
+                    stack.append(rel_path)
+            elif ((extensions is None
+                    or entry.name.lower().endswith(extensions))
+                    and not entry.name.lower().endswith(skip_extensions)
+                    and not is_ignored(rules, rel_path, False)):
+                yield rel_path, False
+
+
+def walk(root: str, start: str = "", rules=None):
+    """
+    Walks root (or its subdirectory start) and returns (paths, directories,
+    rules): the Markdown files and the directories that are not ignored,
+    relative to root, and the .gitignore rules found on the way.
+    """
+    rules = {} if rules is None else rules
+    paths = []
+    directories = []
+    for rel_path, is_dir in scan(root, start, rules):
+        (directories if is_dir else paths).append(rel_path)
+    return paths, directories, rules
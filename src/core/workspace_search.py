@@ -0,0 +1,291 @@
+# src/core/workspace_search.py
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from gi.repository import Gio, GLib, GObject
+
+from .walker import scan
+
+# Files handed to a worker at once; results are delivered per batch.
+BATCH_SIZE = 64
+# Larger files are skipped; they are unlikely to be text we want to edit.
+MAX_FILE_BYTES = 8 * 1024 * 1024
+# Bytes inspected for a NUL to tell binary files apart.
+BINARY_SNIFF_BYTES = 8192
+# Files not worth opening at all: the media and documents decks use.
+BINARY_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff",
+    ".ico", ".avif", ".heic", ".psd", ".pdf", ".pptx", ".key", ".odp",
+    ".docx", ".xlsx", ".mp4", ".mov", ".webm", ".mkv", ".avi", ".mp3",
+    ".wav", ".ogg", ".m4a", ".flac", ".zip", ".gz", ".tar", ".7z",
+    ".woff", ".woff2", ".ttf", ".otf",
+)
+MAX_RESULTS = 10000
+MAX_RESULTS_PER_FILE = 1000
+# Longest line excerpt kept per match.
+EXCERPT_CHARS = 200
+# Saves kept in flight at once by replace_in_files().
+SAVE_BATCH = 8
+
+
+def compile_query(text: str, regex=False, case_sensitive=False):
+    """
+    Compiles a search query. Raises re.error for an invalid regular
+    expression.
+    """
+    flags = re.MULTILINE
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    return re.compile(text if regex else re.escape(text), flags)
+
+
+def compile_replacement(text: str, regex=False):
+    """
+    Returns a function giving the replacement for a match: text as typed,
+    or, for a regular expression, text expanded as a template (e.g. "\\1").
+    Expanding raises re.error or IndexError for an invalid template.
+    """
+    if regex:
+        return lambda match: match.expand(text)
+    return lambda match: text
+
+
+def read_text(path: str):
+    """Returns the text of a file, or None if it is binary or too large."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > MAX_FILE_BYTES:
+                return None
+            # Binary files are told apart by their first bytes, before the
+            # rest is read.
+            data = f.read(BINARY_SNIFF_BYTES)
+            if b"\0" in data:
+                return None
+            data += f.read(MAX_FILE_BYTES + 1 - len(data))
+    except OSError:
+        return None
+    if len(data) > MAX_FILE_BYTES:
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def find_in_text(pattern: re.Pattern, text: str, limit=MAX_RESULTS_PER_FILE):
+    """Returns (line, column, length, line_text) for the matches in text."""
+    matches = []
+    line = 0
+    position = 0
+    for match in pattern.finditer(text):
+        start = match.start()
+        if start == match.end():
+            continue  # Empty matches, e.g. of "^", are not useful here.
+        line += text.count("\n", position, start)
+        position = start
+        line_start = text.rfind("\n", 0, start) + 1
+        line_end = text.find("\n", start)
+        line_end = len(text) if line_end == -1 else line_end
+        matches.append((
+            line, start - line_start, match.end() - start,
+            text[line_start:line_end][:EXCERPT_CHARS],
+        ))
+        if len(matches) >= limit:
+            break
+    return matches
+
+
+class SearchMatch(GObject.Object):
+    """One match: a file relative to the workspace, a line and a span."""
+
+    def __init__(self, path: str, line: int, column: int, length: int,
+                 text: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.line = line
+        self.column = column
+        self.length = length
+        self.text = text
+
+
+class WorkspaceSearch:
+    """
+    Searches the files below a folder, filling a Gio.ListStore with
+    SearchMatch items as they are found.
+
+    A background thread walks the folder (honouring .gitignore) and hands
+    the files in batches to a thread pool, which reads them, skips binary
+    and oversized files, and runs the compiled pattern. Every finished
+    batch is appended to the store on the main loop, so the first hits
+    show while the rest of the folder is still being searched.
+
+    Starting a new search cancels the running one: its remaining batches
+    are skipped and late results are dropped.
+    """
+
+    def __init__(self, store: Gio.ListStore, workers=None):
+        self.store = store
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 2)
+        self.root = None
+        self.file_count = 0
+        self._cancelled = threading.Event()
+        self._serial = 0
+        self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self, root: str, pattern: re.Pattern, on_done=None):
+        """
+        Replaces the results with a search of root for pattern.
+        on_done(truncated) is called on the main loop once every file
+        was searched, with truncated set if MAX_RESULTS was reached.
+        """
+        self.cancel()
+        self.store.remove_all()
+        self.root = root
+        self.file_count = 0
+        self._running = True
+        cancelled = self._cancelled = threading.Event()
+        serial = self._serial
+
+        def run():
+            with ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="workspace-search") as pool:
+                batch = []
+                for rel_path, is_dir in scan(
+                        root, extensions=None,
+                        skip_extensions=BINARY_EXTENSIONS):
+                    if cancelled.is_set():
+                        break
+                    if not is_dir:
+                        batch.append(rel_path)
+                        if len(batch) == BATCH_SIZE:
+                            pool.submit(self._search_batch, serial,
+                                        cancelled, root, pattern, batch)
+                            batch = []
+                if batch:
+                    pool.submit(self._search_batch, serial, cancelled,
+                                root, pattern, batch)
+            GLib.idle_add(self._finish, serial, on_done)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._serial += 1
+        self._running = False
+
+    def _search_batch(self, serial, cancelled, root, pattern, paths):
+        found = []
+        for rel_path in paths:
+            if cancelled.is_set():
+                return
+            text = read_text(os.path.join(root, rel_path))
+            if text is None or pattern.search(text) is None:
+                continue
+            for line, column, length, excerpt in find_in_text(pattern, text):
+                found.append((rel_path, line, column, length, excerpt))
+        GLib.idle_add(self._add, serial, len(paths), found)
+
+    def _add(self, serial, searched, found):
+        if serial != self._serial:
+            return False
+        self.file_count += searched
+        room = MAX_RESULTS - self.store.get_n_items()
+        if found and room > 0:
+            items = [SearchMatch(*match) for match in found[:room]]
+            self.store.splice(self.store.get_n_items(), 0, items)
+            if len(found) >= room:
+                self._cancelled.set()
+        return False
+
+    def _finish(self, serial, on_done):
+        if serial == self._serial:
+            self._running = False
+            if on_done:
+                on_done(self.store.get_n_items() >= MAX_RESULTS)
+        return False
+
+
+def replace_in_files(paths, pattern: re.Pattern, replacement, file_manager,
+                     on_done):
+    """
+    Replaces every match of pattern in the files at paths with
+    replacement(match), see compile_replacement(). Files are read
+    and rewritten on a thread pool, then saved with FileManager's async
+    saves, SAVE_BATCH at a time.
+    on_done(files, replacements, errors) is called on the main loop, where
+    errors is a list of (path, message).
+    """
+    _BatchedReplace(paths, pattern, replacement, file_manager, on_done).start()
+
+
+class _BatchedReplace:
+    def __init__(self, paths, pattern, replacement, file_manager, on_done):
+        self.paths = list(paths)
+        self.pattern = pattern
+        self.replacement = replacement
+        self.file_manager = file_manager
+        self.on_done = on_done
+        self.pending = []
+        self.in_flight = 0
+        self.files = 0
+        self.replacements = 0
+        self.errors = []
+
+    def start(self):
+        threading.Thread(target=self._substitute_all, daemon=True).start()
+
+    def _substitute_all(self):
+        with ThreadPoolExecutor(
+                thread_name_prefix="workspace-replace") as pool:
+            results = list(pool.map(self._substitute, self.paths))
+        GLib.idle_add(self._save_all, results)
+
+    def _substitute(self, path):
+        """Returns (path, new_text, count, error)."""
+        text = read_text(path)
+        if text is None:
+            return path, None, 0, "Not a text file"
+        try:
+            new_text, count = self.pattern.subn(self.replacement, text)
+        except (re.error, IndexError) as e:
+            # e.g. a replacement referring to a group the pattern lacks.
+            return path, None, 0, str(e)
+        return path, new_text, count, None
+
+    def _save_all(self, results):
+        for path, new_text, count, error in results:
+            if error is not None:
+                self.errors.append((path, error))
+            elif count:
+                self.pending.append((path, new_text, count))
+        self._save_next()
+        return False
+
+    def _save_next(self):
+        while self.pending and self.in_flight < SAVE_BATCH:
+            path, new_text, count = self.pending.pop()
+            self.in_flight += 1
+            self.file_manager.save_file_async(
+                Gio.File.new_for_path(path), new_text,
+                lambda file, result, count=count: self._on_saved(
+                    file, result, count))
+        if not self.pending and not self.in_flight and self.on_done:
+            on_done, self.on_done = self.on_done, None
+            on_done(self.files, self.replacements, self.errors)
+
+    def _on_saved(self, file, result, count):
+        self.in_flight -= 1
+        success, message = self.file_manager.save_file_finish(file, result)
+        if success:
+            self.files += 1
+            self.replacements += count
+        else:
+            self.errors.append((file.get_path(), message))
+        self._save_next()
@@ -0,0 +1,233 @@
+# export.py
+#
+# Copyright 2025 nam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+"""
+Headless batch export: `presentat --export DIR`.
+
+Finds the decks below DIR, converts them with the Marp CLI on a bounded
+pool of workers and writes a JSON summary. Decks whose source, referenced
+local assets and export options are unchanged since the previous run are
+skipped. Nothing here imports GTK, so it runs without a display.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import unquote, urlparse
+
+from .core.marp_converter import MARP_MISSING, MarpConverter
+from .core.walker import walk
+
+MANIFEST_NAME = ".presentat-export.json"
+FORMATS = ("html", "pdf")
+# Local files a deck can pull in: Markdown images, HTML src attributes and
+# CSS url() references (e.g. background images).
+ASSET_REFERENCE = re.compile(
+    r"!\[[^\]]*\]\(\s*<?([^)\s>]+)"
+    r"|\bsrc\s*=\s*[\"']([^\"']+)[\"']"
+    r"|url\(\s*[\"']?([^\"')]+)[\"']?\s*\)"
+)
+
+
+def _hash_file(path: str, digest):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+
+def deck_fingerprint(deck_path: str, formats):
+    """Hashes a deck, the local assets it references and the formats."""
+    digest = hashlib.sha256()
+    digest.update(",".join(formats).encode("utf-8"))
+    with open(deck_path, "rb") as f:
+        source = f.read()
+    digest.update(source)
+
+    deck_dir = os.path.dirname(deck_path)
+    references = set()
+    for match in ASSET_REFERENCE.finditer(source.decode("utf-8", "replace")):
+        reference = next(group for group in match.groups() if group)
+        parsed = urlparse(reference)
+        if parsed.scheme in ("", "file"):
+            references.add(unquote(parsed.path))
+    for reference in sorted(references):
+        asset_path = os.path.join(deck_dir, reference)
+        digest.update(reference.encode("utf-8"))
+        if os.path.isfile(asset_path):
+            _hash_file(asset_path, digest)
+    return digest.hexdigest()
+
+
+def export_deck(converter: MarpConverter, source_dir: str, output_dir: str,
+                rel_path: str, formats, previous: str, force: bool):
+    """Exports one deck; runs on a worker thread."""
+    started = time.monotonic()
+    deck_path = os.path.join(source_dir, rel_path)
+    entry = {"path": rel_path, "outputs": []}
+    try:
+        fingerprint = deck_fingerprint(deck_path, formats)
+    except OSError as e:
+        entry.update(status="failed", error=str(e))
+        return entry, None
+
+    stem = os.path.splitext(os.path.join(output_dir, rel_path))[0]
+    outputs = [f"{stem}.{fmt}" for fmt in formats]
+    if (not force and fingerprint == previous
+            and all(os.path.exists(path) for path in outputs)):
+        entry.update(status="skipped", outputs=outputs)
+        return entry, fingerprint
+
+    os.makedirs(os.path.dirname(stem), exist_ok=True)
+    for fmt, output_path in zip(formats, outputs):
+        success, message = converter.export_file(
+            deck_path, output_path, to_pdf=(fmt == "pdf"))
+        if not success:
+            entry.update(status="failed", error=message)
+            entry["seconds"] = round(time.monotonic() - started, 3)
+            return entry, None
+        entry["outputs"].append(output_path)
+
+    entry["status"] = "converted"
+    entry["seconds"] = round(time.monotonic() - started, 3)
+    return entry, fingerprint
+
+
+def _load_manifest(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path: str, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def export_all(source_dir: str, output_dir: str, formats, jobs: int,
+               force=False):
+    """Exports every deck below source_dir and returns the summary dict."""
+    started = time.monotonic()
+    converter = MarpConverter(use_server=False)
+    if not converter.available:
+        raise RuntimeError(MARP_MISSING)
+    decks, _directories, _rules = walk(source_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+
+    results = []
+    new_manifest = {}
+    # Each job mostly waits on its own Marp CLI process, so threads are
+    # enough to keep one conversion running per worker.
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(
+                export_deck, converter, source_dir, output_dir, rel_path,
+                formats, manifest.get(rel_path), force,
+            )
+            for rel_path in sorted(decks)
+        ]
+        for future in as_completed(futures):
+            entry, fingerprint = future.result()
+            results.append(entry)
+            if fingerprint is not None:
+                new_manifest[entry["path"]] = fingerprint
+
+    _write_json(manifest_path, new_manifest)
+    results.sort(key=lambda entry: entry["path"])
+    counts = {
+        status: sum(entry["status"] == status for entry in results)
+        for status in ("converted", "skipped", "failed")
+    }
+    return {
+        "source": source_dir,
+        "output": output_dir,
+        "formats": list(formats),
+        "jobs": jobs,
+        **counts,
+        "seconds": round(time.monotonic() - started, 3),
+        "decks": results,
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="presentat",
+        description="Export every Marp deck in a folder without the GUI.",
+    )
+    parser.add_argument(
+        "--export", metavar="DIR", required=True,
+        help="folder to search for Markdown decks")
+    parser.add_argument(
+        "--output", metavar="DIR",
+        help="where to write exports (default: next to each deck)")
+    parser.add_argument(
+        "--format", default="html",
+        help="comma-separated output formats: html, pdf (default: html)")
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1,
+        help="number of decks converted in parallel (default: CPU count)")
+    parser.add_argument(
+        "--summary", metavar="FILE",
+        help="write the JSON summary to FILE instead of stdout")
+    parser.add_argument(
+        "--force", action="store_true",
+        help="convert decks even if they are unchanged")
+    args = parser.parse_args(argv)
+
+    formats = tuple(fmt.strip() for fmt in args.format.split(",") if fmt)
+    unknown = set(formats) - set(FORMATS)
+    if not formats or unknown:
+        parser.error(f"unsupported format: {', '.join(sorted(unknown))}")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    args.formats = formats
+    return args
+
+
+def main(argv):
+    """Entry point for `presentat --export`. Returns the exit status."""
+    args = parse_args(argv)
+    source_dir = os.path.abspath(args.export)
+    if not os.path.isdir(source_dir):
+        print(f"Not a folder: {args.export}", file=sys.stderr)
+        return 2
+    output_dir = os.path.abspath(args.output) if args.output else source_dir
+
+    try:
+        summary = export_all(
+            source_dir, output_dir, args.formats, args.jobs, args.force)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if args.summary:
+        _write_json(args.summary, summary)
+    else:
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 1 if summary["failed"] else 0
@@ -0,0 +1,168 @@
+# find_in_files_dialog.py
+#
+# Copyright 2025 nam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+import os
+import re
+
+from gi.repository import Adw, Gio, GLib, Gtk, Pango
+
+from .core.workspace_search import (
+    SearchMatch, WorkspaceSearch, compile_query, compile_replacement,
+)
+
+
+@Gtk.Template(resource_path="/app/nam/Presentat/find_in_files_dialog.ui")
+class FindInFilesDialog(Adw.Dialog):
+    __gtype_name__ = "FindInFilesDialog"
+    search_entry = Gtk.Template.Child()
+    case_button = Gtk.Template.Child()
+    regex_button = Gtk.Template.Child()
+    replace_entry = Gtk.Template.Child()
+    replace_button = Gtk.Template.Child()
+    status_label = Gtk.Template.Child()
+    results_list_view = Gtk.Template.Child()
+
+    def __init__(self, root, on_match_chosen, on_replace, **kwargs):
+        """
+        on_match_chosen(file, line, column) opens a match;
+        on_replace(paths, pattern, replacement, on_done) replaces in the
+        given files, replacement being a compile_replacement() function,
+        and calls on_done(files, replacements, errors) on the main loop.
+        """
+        super().__init__(**kwargs)
+        self.root = root
+        self.on_match_chosen = on_match_chosen
+        self.on_replace = on_replace
+        self.pattern = None
+        self.truncated = False
+        # Files with at least one match among the results.
+        self._files = set()
+
+        self.results = Gio.ListStore.new(SearchMatch)
+        self.search = WorkspaceSearch(self.results)
+        self.selection = Gtk.NoSelection(model=self.results)
+        self.results_list_view.set_model(self.selection)
+        factory = self.results_list_view.get_factory()
+        factory.connect("setup", self._factory_setup)
+        factory.connect("bind", self._factory_bind)
+
+        self.search_entry.connect("search-changed", self._on_query_changed)
+        self.case_button.connect("toggled", self._on_query_changed)
+        self.regex_button.connect("toggled", self._on_query_changed)
+        self.replace_button.connect("clicked", self._on_replace_clicked)
+        self.results_list_view.connect("activate", self._on_row_activated)
+        self.results.connect("items-changed", self._on_results_changed)
+        self.connect("closed", self._on_closed)
+        self._closed = False
+
+        self.set_focus(self.search_entry)
+
+    def _factory_setup(self, factory, list_item: Gtk.ListItem):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        location = Gtk.Label(xalign=0.0)
+        location.add_css_class("dim-label")
+        location.add_css_class("caption")
+        text = Gtk.Label(xalign=0.0, single_line_mode=True,
+                         ellipsize=Pango.EllipsizeMode.END)
+        box.append(location)
+        box.append(text)
+        list_item.set_child(box)
+
+    def _factory_bind(self, factory, list_item: Gtk.ListItem):
+        match: SearchMatch = list_item.get_item()
+        box: Gtk.Box = list_item.get_child()
+        location: Gtk.Label = box.get_first_child()
+        text: Gtk.Label = box.get_last_child()
+        location.set_text(f"{match.path}:{match.line + 1}")
+        end = match.column + match.length
+        text.set_markup(
+            GLib.markup_escape_text(match.text[:match.column].lstrip())
+            + "<b>" + GLib.markup_escape_text(match.text[match.column:end])
+            + "</b>" + GLib.markup_escape_text(match.text[end:]))
+
+    def _on_query_changed(self, widget):
+        query = self.search_entry.get_text()
+        self.truncated = False
+        if not query:
+            self.pattern = None
+            self.search.cancel()
+            self.results.remove_all()
+            self.status_label.set_text("")
+            return
+        try:
+            self.pattern = compile_query(
+                query, self.regex_button.get_active(),
+                self.case_button.get_active())
+        except re.error as e:
+            self.pattern = None
+            self.search.cancel()
+            self.results.remove_all()
+            self.status_label.set_text(f"Invalid regular expression: {e}")
+            return
+        self.search.start(self.root, self.pattern, self._on_search_done)
+        self._update_status()
+
+    def _on_search_done(self, truncated):
+        self.truncated = truncated
+        self._update_status()
+
+    def _on_results_changed(self, model, position, removed, added):
+        if removed:
+            self._files.clear()  # Only ever cleared all at once.
+        for i in range(position, position + added):
+            self._files.add(model.get_item(i).path)
+        self._update_status()
+
+    def _update_status(self):
+        count = self.results.get_n_items()
+        files = len(self._files)
+        if self.search.running:
+            status = f"Searching… {count} matches in {files} files"
+        elif self.truncated:
+            status = f"Showing the first {count} matches in {files} files"
+        else:
+            status = f"{count} matches in {files} files"
+        self.status_label.set_text(status)
+        # Replacing needs every match, not the first few thousand.
+        self.replace_button.set_sensitive(
+            count > 0 and not self.search.running and not self.truncated)
+
+    def _on_row_activated(self, list_view: Gtk.ListView, position: int):
+        match: SearchMatch = self.results.get_item(position)
+        self.close()
+        self.on_match_chosen(
+            Gio.File.new_for_path(os.path.join(self.root, match.path)),
+            match.line, match.column)
+
+    def _on_replace_clicked(self, button):
+        paths = [os.path.join(self.root, path) for path in sorted(self._files)]
+        self.replace_button.set_sensitive(False)
+        self.status_label.set_text(f"Replacing in {len(paths)} files…")
+        replacement = compile_replacement(
+            self.replace_entry.get_text(), self.regex_button.get_active())
+        self.on_replace(paths, self.pattern, replacement,
+                        self._on_replace_done)
+
+    def _on_replace_done(self, files, replacements, errors):
+        if not self._closed:
+            # Search again, which shows what is left.
+            self._on_query_changed(None)
+
+    def _on_closed(self, dialog):
+        self._closed = True
+        self.search.cancel()
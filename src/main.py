@@ -24,19 +24,26 @@ gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 
 from gi.repository import Gtk, Gio, Adw
-from .window import PresentatWindow
 
 
 class PresentatApplication(Adw.Application):
     """The main application singleton class."""
 
-    def __init__(self):
+    def __init__(self, launched=None):
+        self.launched = launched
         super().__init__(application_id='app.nam.Presentat',
                          flags=Gio.ApplicationFlags.DEFAULT_FLAGS,
                          resource_base_path='/app/nam/Presentat')
         self.create_action('quit', lambda *_: self.quit(), ['<primary>q'])
         self.create_action('about', self.on_about_action)
         self.create_action('preferences', self.on_preferences_action)
+        self.set_accels_for_action('win.quick-open', ['<primary>p'])
+        self.set_accels_for_action('win.find-in-files', ['<primary><shift>f'])
+        self.set_accels_for_action('win.render-now', ['<primary>r'])
+        self.set_accels_for_action('win.new-tab', ['<primary>t'])
+        self.set_accels_for_action('win.close-tab', ['<primary>w'])
+        self.set_accels_for_action('win.show-render-timings',
+                                   ['<primary><shift>t'])
 
     def do_activate(self):
         """Called when the application is activated.
@@ -46,7 +53,11 @@ class PresentatApplication(Adw.Application):
         """
         win = self.props.active_window
         if not win:
-            win = PresentatWindow(application=self)
+            # Imported here so registering the application does not wait
+            # for the window and its modules.
+            from .window import PresentatWindow
+
+            win = PresentatWindow(application=self, launched=self.launched)
         win.present()
 
     def on_about_action(self, *args):
@@ -81,7 +92,10 @@ class PresentatApplication(Adw.Application):
             self.set_accels_for_action(f"app.{name}", shortcuts)
 
 
-def main(version):
-    """The application's entry point."""
-    app = PresentatApplication()
+def main(version, launched=None):
+    """
+    The application's entry point. launched is the time.monotonic() at
+    which the launcher started, used to report startup time.
+    """
+    app = PresentatApplication(launched)
     return app.run(sys.argv)
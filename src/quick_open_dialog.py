@@ -0,0 +1,108 @@
+# quick_open_dialog.py
+#
+# Copyright 2025 nam
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+import os
+
+from gi.repository import Adw, Gdk, Gio, Gtk
+
+
+@Gtk.Template(resource_path="/app/nam/Presentat/quick_open_dialog.ui")
+class QuickOpenDialog(Adw.Dialog):
+    __gtype_name__ = "QuickOpenDialog"
+    search_entry = Gtk.Template.Child()
+    results_list_view = Gtk.Template.Child()
+
+    def __init__(self, file_index, on_file_chosen, **kwargs):
+        super().__init__(**kwargs)
+        self.file_index = file_index
+        self.on_file_chosen = on_file_chosen
+
+        self.results = Gtk.StringList()
+        self.selection = Gtk.SingleSelection(model=self.results)
+        self.results_list_view.set_model(self.selection)
+        factory = self.results_list_view.get_factory()
+        factory.connect("setup", self._factory_setup)
+        factory.connect("bind", self._factory_bind)
+
+        self.search_entry.connect("search-changed", self._on_search_changed)
+        self.search_entry.connect("activate", self._on_entry_activate)
+        self.results_list_view.connect("activate", self._on_row_activated)
+
+        key_controller = Gtk.EventControllerKey()
+        key_controller.connect("key-pressed", self._on_key_pressed)
+        self.search_entry.add_controller(key_controller)
+
+        self._show_results("")
+        self.set_focus(self.search_entry)
+
+    def _factory_setup(self, factory, list_item: Gtk.ListItem):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        name = Gtk.Label(xalign=0.0)
+        path = Gtk.Label(xalign=0.0)
+        path.add_css_class("dim-label")
+        path.add_css_class("caption")
+        box.append(name)
+        box.append(path)
+        list_item.set_child(box)
+
+    def _factory_bind(self, factory, list_item: Gtk.ListItem):
+        rel_path = list_item.get_item().get_string()
+        box: Gtk.Box = list_item.get_child()
+        name: Gtk.Label = box.get_first_child()
+        path: Gtk.Label = box.get_last_child()
+        directory, _, basename = rel_path.rpartition("/")
+        name.set_text(basename)
+        path.set_text(directory)
+
+    def _show_results(self, query: str):
+        paths = self.file_index.search(query)
+        self.results.splice(0, self.results.get_n_items(), paths)
+        if paths:
+            self.selection.set_selected(0)
+
+    def _on_search_changed(self, entry: Gtk.SearchEntry):
+        self._show_results(entry.get_text())
+
+    def _on_key_pressed(self, controller, keyval, keycode, state):
+        count = self.results.get_n_items()
+        if not count:
+            return False
+        selected = self.selection.get_selected()
+        if keyval == Gdk.KEY_Down:
+            self.selection.set_selected(min(selected + 1, count - 1))
+        elif keyval == Gdk.KEY_Up:
+            self.selection.set_selected(max(selected - 1, 0))
+        else:
+            return False
+        self.results_list_view.scroll_to(
+            self.selection.get_selected(), Gtk.ListScrollFlags.NONE, None)
+        return True
+
+    def _on_entry_activate(self, entry: Gtk.SearchEntry):
+        selected = self.selection.get_selected()
+        if selected != Gtk.INVALID_LIST_POSITION:
+            self._choose(selected)
+
+    def _on_row_activated(self, list_view: Gtk.ListView, position: int):
+        self._choose(position)
+
+    def _choose(self, position: int):
+        rel_path = self.results.get_string(position)
+        self.close()
+        self.on_file_chosen(
+            Gio.File.new_for_path(os.path.join(self.file_index.root, rel_path)))
@@ -16,14 +16,36 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
-from threading import Thread
-from .core.previewer import PresentationPreviewer
+from .core.document import Document
+from .core.preview_pool import PreviewPool
 from .core.marp_converter import MarpConverter
-from .core.directory_tree import create_child_model_func, FileListItem
-from .core.file_manager import FileManager
+from .core.metrics import preview_metrics
+from .core.conversion_scheduler import ConversionScheduler
+from .core.adaptive_debounce import AdaptiveDebounce
+from .core.directory_tree import DirectoryMonitors, FileListItem
+from .core.file_manager import FileManager, CHUNK_SIZE
+from .core.file_index import FileIndex
+from .core.render_cache import RenderCache, content_hash
+from .core.edit_journal import EditJournal, JournalWriter, recover_journals
+from .core.slide_navigator import SlideNavigator
+from .core.workspace_search import replace_in_files
+from .quick_open_dialog import QuickOpenDialog
+from .find_in_files_dialog import FindInFilesDialog
 from gi.repository import Adw, Gtk, Gio, GLib
+import os
 import re
-from urllib.parse import urlparse
+import threading
+import time
+
+
+# Buffers larger than this many characters are saved chunk by chunk.
+STREAM_SAVE_THRESHOLD = 4 * 1024 * 1024
+# Preview views kept alive at once; background tabs beyond this many have
+# their view reused and restore it from their last rendered deck.
+MAX_PREVIEW_VIEWS = 3
+# When set, preview timing histograms are written as JSON to this path
+# ("-" for stderr) after every preview update.
+METRICS_PATH = os.environ.get("PRESENTAT_METRICS")
 
 
 @Gtk.Template(resource_path="/app/nam/Presentat/window.ui")
@@ -35,18 +57,27 @@ class PresentatWindow(Adw.ApplicationWindow):
     action_menu = Gtk.Template.Child()
 
     preview_container = Gtk.Template.Child()
+    tab_view = Gtk.Template.Child()
+    timings_label = Gtk.Template.Child()
+    navigator_revealer = Gtk.Template.Child()
     split_view = Gtk.Template.Child()
     marp_converter = None
     show_sidebar_button = Gtk.Template.Child()
 
     directory_list_view = Gtk.Template.Child()
-    preview_web_view = None
 
-    def __init__(self, **kwargs):
+    def __init__(self, launched=None, **kwargs):
         super().__init__(**kwargs)
+        self._launched = launched
 
-        self.preview_web_view = PresentationPreviewer()
-        self.preview_container.set_child(self.preview_web_view)
+        self.preview_pool = PreviewPool(
+            MAX_PREVIEW_VIEWS,
+            lambda view: view.connect(
+                "preview-updated", self._on_preview_updated),
+        )
+        self.memory_monitor = Gio.MemoryMonitor.dup_default()
+        self.memory_monitor.connect(
+            "low-memory-warning", self._on_low_memory_warning)
 
         self.file_manager = FileManager()
         self.sidebar_expanded_position = 300
@@ -63,12 +94,57 @@ class PresentatWindow(Adw.ApplicationWindow):
         open_folder_action.connect("activate", self.open_folder_dialog)
         self.add_action(open_folder_action)
 
-        buffer = self.main_text_view.get_buffer()
-        buffer.connect("notify::cursor-position", self.update_cursor_position)
+        quick_open_action = Gio.SimpleAction(name="quick-open")
+        quick_open_action.connect("activate", self.quick_open_dialog)
+        self.add_action(quick_open_action)
+
+        find_in_files_action = Gio.SimpleAction(name="find-in-files")
+        find_in_files_action.connect("activate", self.find_in_files_dialog)
+        self.add_action(find_in_files_action)
+        self.file_index = FileIndex()
+
+        timings_action = Gio.SimpleAction.new_stateful(
+            "show-render-timings", None, GLib.Variant.new_boolean(False))
+        timings_action.connect("activate", self._toggle_render_timings)
+        self.add_action(timings_action)
+
+        render_now_action = Gio.SimpleAction(name="render-now")
+        render_now_action.connect("activate", self._render_now)
+        self.add_action(render_now_action)
+
+        idle_render_action = Gio.SimpleAction.new_stateful(
+            "render-when-idle", None, GLib.Variant.new_boolean(False))
+        idle_render_action.connect("activate", self._toggle_render_when_idle)
+        self.add_action(idle_render_action)
+
+        new_tab_action = Gio.SimpleAction(name="new-tab")
+        new_tab_action.connect("activate", self._new_tab)
+        self.add_action(new_tab_action)
+
+        close_tab_action = Gio.SimpleAction(name="close-tab")
+        close_tab_action.connect("activate", self._close_tab)
+        self.add_action(close_tab_action)
+
+        self.follow_cursor = True
+        follow_cursor_action = Gio.SimpleAction.new_stateful(
+            "follow-cursor", None, GLib.Variant.new_boolean(True))
+        follow_cursor_action.connect("activate", self._toggle_follow_cursor)
+        self.add_action(follow_cursor_action)
+
+        self.slide_navigator = SlideNavigator()
+        self.slide_navigator.connect(
+            "slide-activated", self._on_slide_activated)
+        self.navigator_revealer.set_child(self.slide_navigator)
+        navigator_action = Gio.SimpleAction.new_stateful(
+            "show-slide-navigator", None, GLib.Variant.new_boolean(True))
+        navigator_action.connect("activate", self._toggle_slide_navigator)
+        self.add_action(navigator_action)
 
         self.root_list_store = Gio.ListStore.new(FileListItem)
+        self.directory_monitors = DirectoryMonitors()
         self.tree_list_model = Gtk.TreeListModel.new(
-            self.root_list_store, False, False, create_child_model_func
+            self.root_list_store, False, False,
+            self.directory_monitors.create_child_model
         )
 
         selection_model = Gtk.SingleSelection(model=self.tree_list_model)
@@ -82,81 +158,400 @@ class PresentatWindow(Adw.ApplicationWindow):
                                 self.on_list_item_selected)
 
         self.current_folder = None
-        self._current_file = None
-        self._preview_update_timeout_id = None
-        self.marp_converter = MarpConverter()
-        buffer.connect("changed", self.on_text_changed)
-
-    def on_text_changed(self, buffer):
-        if self._preview_update_timeout_id is not None:
-            GLib.source_remove(self._preview_update_timeout_id)
-
-        self._preview_update_timeout_id = GLib.timeout_add_seconds(
-            0.5, self._trigger_marp_conversion
+        self._documents = {}
+        self._document = None
+        self._submitted_document = None
+        self._edit_started = None
+        # The converter is created once the window is up (or on the first
+        # preview, if that comes sooner); see _start_backend().
+        self.conversion_scheduler = ConversionScheduler(
+            None, self._on_marp_html_received
         )
-
-    def _trigger_marp_conversion(self):
-        self._preview_update_timeout_id = None
-        markdown_text = self.main_text_view.get_buffer().get_text(
-            self.main_text_view.get_buffer().get_start_iter(),
-            self.main_text_view.get_buffer().get_end_iter(),
-            False,
+        self.preview_placeholder = Adw.StatusPage(
+            icon_name="x-office-presentation-symbolic",
+            title="No Preview",
+            description="Slides appear here as you write.",
         )
-        if self._current_file:
-            try:
-                current_dir = self._current_file.get_parent().get_path()
-
-                pattern = re.compile(r"\!\[.*?\]\((.*?)\)")
-
-                def replace_uri(match):
-                    original_path = match.group(1)
-                    parsed_uri = urlparse(original_path)
-                    if parsed_uri.scheme in ["http", "https", "file"]:
-                        return match.group(0)
-                    full_path = GLib.build_filenamev(
-                        [current_dir, original_path])
-
-                    # Convert the local path to a file URI
-                    file_uri = Gio.File.new_for_path(full_path).get_uri()
-
-                    # Return the modified Markdown string with the new URI
-                    return match.group(0).replace(original_path, file_uri)
-
-                modified_markdown_text = pattern.sub(
-                    replace_uri, markdown_text)
-
-            except Exception as e:
-                # Fallback to the original text if path conversion fails
-                print(f"Error during image path conversion: {e}")
-                modified_markdown_text = markdown_text
+        self.preview_container.set_child(self.preview_placeholder)
+        self.render_cache = RenderCache()
+        self._submitted_cache_key = None
+        self.debounce = AdaptiveDebounce(
+            self.conversion_scheduler, self._submit_preview)
+        self.tab_view.connect(
+            "notify::selected-page", self._on_selected_page_changed)
+        self.tab_view.connect("close-page", self._on_close_page)
+        self.journal_writer = JournalWriter()
+        # Set once unsaved changes were saved or discarded on closing.
+        self._close_confirmed = False
+        self._new_document()
+        self.main_text_view.grab_focus()
+        self.connect("close-request", self._on_close_request)
+
+        # Editor and sidebar first; WebKit and Marp after the first frame.
+        self.add_tick_callback(self._on_first_frame)
+        GLib.idle_add(self._start_backend, priority=GLib.PRIORITY_LOW)
+        threading.Thread(target=self._find_recoverable, daemon=True).start()
+
+    def _on_first_frame(self, widget, frame_clock):
+        if self._launched is not None:
+            preview_metrics.record("startup", time.monotonic() - self._launched)
+        return GLib.SOURCE_REMOVE
+
+    def _start_backend(self):
+        if self._ensure_converter().available:
+            self.preview_pool.prewarm()
+        return False
+
+    def _ensure_converter(self):
+        """Creates the Marp converter on first use."""
+        if self.marp_converter is None:
+            self.marp_converter = MarpConverter()
+            self.conversion_scheduler.converter = self.marp_converter
+            if self.marp_converter.available:
+                self.marp_converter.warm_up()
+            else:
+                # Degraded mode: editing and saving still work.
+                self.preview_placeholder.set_title("Marp Not Found")
+                self.preview_placeholder.set_description(
+                    "Install the Marp CLI and restart Presentat to see "
+                    "previews. Editing and saving still work.")
+        return self.marp_converter
+
+    def _on_close_request(self, window):
+        unsaved = [
+            document for document in self._documents.values()
+            if document.unsaved
+        ]
+        if unsaved and not self._close_confirmed:
+            self._confirm_close(unsaved, self._on_window_close_confirmed)
+            return True
+        self.debounce.cancel()
+        self.render_cache.flush()
+        if self.marp_converter is not None:
+            self.marp_converter.shutdown()
+        self.directory_monitors.stop_all()
+        self.file_index.stop()
+        # Journals are for crashes; closing the window drops them.
+        for document in self._documents.values():
+            document.journal.reset()
+        self.journal_writer.stop()
+        return False
+
+    def _on_window_close_confirmed(self, close):
+        if close:
+            self._close_confirmed = True
+            self.close()
+
+    # Documents and tabs
+    def _new_document(self, file=None):
+        """Opens an empty document in a new tab and selects it."""
+        document = Document(file)
+        document.journal = EditJournal(
+            self.journal_writer, file.get_path() if file else None)
+        document.buffer.connect("changed", self.on_text_changed, document)
+        document.buffer.connect(
+            "notify::cursor-position", self.update_cursor_position)
+        document.buffer.connect("insert-text", self._on_insert_text, document)
+        document.buffer.connect(
+            "delete-range", self._on_delete_range, document)
+        # The page child is a placeholder: every tab shares the editor and
+        # preview below the tab bar.
+        document.page = self.tab_view.append(Gtk.Box())
+        document.page.set_title(document.title)
+        self._documents[document.page] = document
+        self.tab_view.set_selected_page(document.page)
+        return document
+
+    def _new_tab(self, action, _):
+        self._new_document()
+
+    def _close_tab(self, action, _):
+        page = self.tab_view.get_selected_page()
+        if page is not None:
+            self.tab_view.close_page(page)
+
+    def _on_close_page(self, tab_view, page):
+        document = self._documents[page]
+        if document.unsaved:
+            self._confirm_close(
+                [document],
+                lambda close: self._finish_close_page(page, close))
         else:
-            modified_markdown_text = markdown_text
+            self._finish_close_page(page, True)
+        return True
 
-        # We need to run the blocking conversion in a separate thread
-        conversion_thread = Thread(
-            target=self._run_conversion, args=(modified_markdown_text,)
+    def _finish_close_page(self, page, close):
+        tab_view = self.tab_view
+        if not close:
+            tab_view.close_page_finish(page, False)
+            return
+        document = self._documents.pop(page)
+        document.journal.reset()
+        self.preview_pool.release(document)
+        if self._submitted_document is document:
+            self._submitted_document = None
+        if self._document is document:
+            self._document = None
+        tab_view.close_page_finish(page, True)
+        if tab_view.get_n_pages() == 0:
+            self._new_document()
+
+    def _confirm_close(self, documents, on_done):
+        """
+        Asks whether to save the unsaved changes of documents, which are
+        about to be closed. on_done(close) is called once they are saved
+        or discarded, or with False if the user cancels or a save fails.
+        """
+        if len(documents) == 1:
+            body = f"{documents[0].title} has unsaved changes."
+        else:
+            body = f"{len(documents)} documents have unsaved changes."
+        dialog = Adw.AlertDialog(
+            heading="Save Changes?",
+            body=body + " Changes that are not saved will be lost.",
         )
-        conversion_thread.start()
+        dialog.add_response("cancel", "_Cancel")
+        dialog.add_response("discard", "_Discard")
+        dialog.add_response("save", "_Save")
+        dialog.set_response_appearance(
+            "discard", Adw.ResponseAppearance.DESTRUCTIVE)
+        dialog.set_response_appearance(
+            "save", Adw.ResponseAppearance.SUGGESTED)
+        dialog.set_default_response("save")
+        dialog.set_close_response("cancel")
+        dialog.connect(
+            "response", self._on_close_response, list(documents), on_done)
+        dialog.present(self)
+
+    def _on_close_response(self, dialog, response, documents, on_done):
+        if response == "save":
+            self._save_all(documents, on_done)
+        else:
+            on_done(response == "discard")
 
-        return False  # Required for GLib timeout
+    def _save_all(self, documents, on_done):
+        """Saves documents one after the other, asking for missing names."""
+        if not documents:
+            on_done(True)
+            return
+        document, rest = documents[0], documents[1:]
 
-    def _run_conversion(self, markdown_content):
-        """Runs the blocking conversion in a background thread."""
-        success, result = self.marp_converter.convert_to_html(markdown_content)
+        def on_saved(success):
+            if success:
+                self._save_all(rest, on_done)
+            else:
+                on_done(False)
 
-        # Use GLib.idle_add to update the UI from the main thread
-        GLib.idle_add(self._on_marp_html_received, success, result)
+        if document.file is not None:
+            self.save_file(document.file, document, on_saved)
+        else:
+            self.tab_view.set_selected_page(document.page)
+            Gtk.FileDialog().save(
+                self, None, self.on_save_response, document, on_saved)
+
+    def _on_selected_page_changed(self, tab_view, pspec):
+        page = tab_view.get_selected_page()
+        if page is not None:
+            self._activate(self._documents[page])
+
+    def _activate(self, document):
+        """Shows document in the editor and the preview."""
+        if document is self._document:
+            return
+        # Only the selected document renders.
+        self.debounce.cancel()
+        self._edit_started = None
+        self._document = document
+        self.main_text_view.set_buffer(document.buffer)
+        self.main_text_view.set_editable(document.editable)
+
+        if document.view is not None or document.deck is not None:
+            self._show_preview(document)
+        else:
+            self.preview_container.set_child(self.preview_placeholder)
+        self.slide_navigator.set_deck(
+            document.deck, document.view.base_uri if document.view else None)
+
+        self.set_title(document.title)
+        self.update_cursor_position(document.buffer, None)
+        if document.stale and not document.loading and not document.is_blank:
+            self.debounce.render_now()
+
+    def _show_preview(self, document):
+        """Puts a preview view for document on screen and returns it."""
+        view, fresh = self.preview_pool.acquire(document)
+        self._set_base_folder(document)
+        self.preview_container.set_child(view)
+        if fresh and document.deck is not None:
+            view.show_deck(document.deck)
+        return view
+
+    def _set_base_folder(self, document):
+        """Lets document's preview load assets from its folders."""
+        if document.view is not None:
+            document.view.set_base_folder(
+                document.file.get_parent() if document.file else None,
+                self.current_folder)
+
+    def _find_document(self, file: Gio.File):
+        for document in self._documents.values():
+            if document.file is not None and document.file.equal(file):
+                return document
+        return None
+
+    def _on_low_memory_warning(self, monitor, level):
+        # Background tabs can restore their preview from their last deck.
+        self.preview_pool.trim(keep=self._document)
+
+    # Scroll sync
+    def _on_insert_text(self, buffer, location, text, length, document):
+        if not document.loading:
+            document.slide_index.lines_inserted(
+                location.get_line(), text.count("\n"))
+            document.journal.inserted(location.get_offset(), text)
+
+    def _on_delete_range(self, buffer, start, end, document):
+        if not document.loading:
+            document.slide_index.lines_deleted(start.get_line(), end.get_line())
+            document.journal.deleted(start.get_offset(), end.get_offset())
+
+    def _set_deck(self, document, deck):
+        document.deck = deck
+        if not document.stale and deck.get("lines"):
+            # Otherwise the buffer moved on since this render; keep the
+            # incrementally shifted index until the next one.
+            document.slide_index.reset(list(deck["lines"]))
+        view = document.view
+        if view is None and document is self._document:
+            view = self._show_preview(document)
+        if document is self._document:
+            self.slide_navigator.set_deck(deck, view.base_uri)
+        if view is not None:
+            view.show_deck(deck)
+            self._follow_cursor(document)
+
+    def _follow_cursor(self, document):
+        """Scrolls the preview to the slide holding the cursor."""
+        buffer = document.buffer
+        line = buffer.get_iter_at_offset(buffer.props.cursor_position).get_line()
+        slide = document.slide_index.slide_at(line)
+        if document is self._document:
+            self.slide_navigator.select(slide)
+        if document.view is not None and self.follow_cursor:
+            document.view.scroll_to_slide(slide)
+
+    def _on_slide_activated(self, navigator, index):
+        """Moves the editor and the preview to a slide of the navigator."""
+        document = self._document
+        buffer = document.buffer
+        _found, location = buffer.get_iter_at_line(
+            document.slide_index.start_line(index))
+        buffer.place_cursor(location)
+        self.main_text_view.scroll_to_mark(
+            buffer.get_insert(), 0.0, True, 0.0, 0.0)
+        if document.view is not None:
+            document.view.scroll_to_slide(index)
+        self.main_text_view.grab_focus()
+
+    def _toggle_slide_navigator(self, action, _):
+        visible = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(visible))
+        self.navigator_revealer.set_reveal_child(visible)
+
+    def _toggle_follow_cursor(self, action, _):
+        self.follow_cursor = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(self.follow_cursor))
+        if self.follow_cursor and self._document is not None:
+            self._follow_cursor(self._document)
+
+    def on_text_changed(self, buffer, document):
+        if document.loading:
+            return
+        document.journal.maybe_compact(document.get_text)
+        document.stale = True
+        if document is not self._document:
+            return
+        if self._edit_started is None:
+            self._edit_started = time.monotonic()
+        self.debounce.edited()
+
+    def _render_now(self, action, _):
+        self.debounce.render_now()
+
+    def _toggle_render_when_idle(self, action, _):
+        idle_only = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(idle_only))
+        self.debounce.idle_only = idle_only
+
+    def _submit_preview(self):
+        if self._edit_started is not None:
+            preview_metrics.record(
+                "debounce", time.monotonic() - self._edit_started)
+            self._edit_started = None
+        document = self._document
+        converter = self._ensure_converter()
+        if not converter.available:
+            return
+        with preview_metrics.timer("extract"):
+            markdown_text = document.get_text()
+        if (self._submitted_document not in (None, document)
+                and self.conversion_scheduler.busy):
+            # Its pending result is about to be superseded.
+            self._submitted_document.stale = True
+        self._submitted_document = document
+        document.stale = False
+        # Image paths are resolved and the deck converted on the
+        # scheduler's thread; only the latest submission is shown.
+        path = document.file.get_path() if document.file else None
+        base_dir = os.path.dirname(path) if path else None
+        self._submitted_cache_key = self._render_cache_key(
+            path, markdown_text)
+        self.conversion_scheduler.submit(markdown_text, base_dir)
+
+    def _render_cache_key(self, path, markdown_text):
+        """Returns the render cache key for a file's text, or None."""
+        converter = self._ensure_converter()
+        if path is None or not converter.available:
+            return None
+        return path, content_hash(markdown_text), converter.cache_options()
 
     def _on_marp_html_received(self, success, result):
+        self.debounce.rendered(self.conversion_scheduler.last_duration)
+        document = self._submitted_document
+        if document is None:
+            return  # Its tab was closed.
         if success:
-            self.preview_web_view.load_marp_html(result)
-            # You can add a toast here for success if you wish
+            self._set_deck(document, result)
+            if self._submitted_cache_key is not None:
+                self.render_cache.store(*self._submitted_cache_key, result)
         else:
             error_html = f"<html><body><h1>Error</h1><p>{
                 GLib.markup_escape_text(result)
             }</p></body></html>"
-            self.preview_web_view.load_marp_html(error_html)
-            self.toast_overlay.add_toast(Adw.Toast(title="Conversion failed"))
+            view = document.view
+            if view is None and document is self._document:
+                view = self._show_preview(document)
+            if view is not None:
+                view.load_marp_html(error_html)
+            if document is self._document:
+                self.toast_overlay.add_toast(
+                    Adw.Toast(title="Conversion failed"))
+
+    # Render timings
+    def _toggle_render_timings(self, action, _):
+        visible = not action.get_state().get_boolean()
+        action.set_state(GLib.Variant.new_boolean(visible))
+        self.timings_label.set_visible(visible)
+        self.timings_label.set_text(preview_metrics.format_overlay())
+
+    def _on_preview_updated(self, previewer):
+        if self.timings_label.get_visible():
+            self.timings_label.set_text(preview_metrics.format_overlay())
+        if METRICS_PATH:
+            try:
+                preview_metrics.dump(METRICS_PATH)
+            except OSError as e:
+                print(f"Unable to write render timings: {e}")
 
     def _factory_setup(self, factory, list_item: Gtk.ListItem):
         """
@@ -183,21 +578,10 @@ class PresentatWindow(Adw.ApplicationWindow):
         label: Gtk.Label = box.get_last_child()
 
         expander.set_list_row(tree_list_row)
+        self.directory_monitors.track_row(tree_list_row)
 
         label.set_text(item.display_name)
-
-        try:
-            file_info = item.file.query_info(
-                "standard::icon", Gio.FileQueryInfoFlags.NONE, None
-            )
-            gicon = file_info.get_icon()
-        except GLib.Error:
-            gicon = Gio.Icon.new_for_string("text-x-generic-symbolic")
-
-        if item.is_dir:
-            gicon = Gio.Icon.new_for_string("folder-symbolic")
-
-        icon.set_from_gicon(gicon)
+        icon.set_from_gicon(item.icon)
 
     def on_list_item_selected(self, selection_model: Gtk.SingleSelection, pspec):
         selected_row: Gtk.TreeListRow = selection_model.get_selected_item()
@@ -216,46 +600,103 @@ class PresentatWindow(Adw.ApplicationWindow):
 
     # Cursor stuff
     def update_cursor_position(self, buffer, _):
+        if buffer is not self.main_text_view.get_buffer():
+            return
         cursor_pos = buffer.props.cursor_position
         iter = buffer.get_iter_at_offset(cursor_pos)
         line = iter.get_line() + 1
         column = iter.get_line_offset() + 1
         self.cursor_pos.set_text(f"Ln {line}, Col {column}")
+        if not self._document.loading:
+            self._follow_cursor(self._document)
 
     # Save file stuff
     def save_file_dialog(self, action, _):
         native = Gtk.FileDialog()
         native.save(self, None, self.on_save_response)
 
-    def on_save_response(self, dialog, result):
+    def on_save_response(self, dialog, result, document=None, on_done=None):
         try:
             file = dialog.save_finish(result)
-            if file is not None:
-                self.save_file(file)
         except GLib.Error as e:
-            self.toast_overlay.add_toast(
-                Adw.Toast(title=f"Error saving file: {e.message}")
-            )
+            if not e.matches(Gtk.dialog_error_quark(),
+                             Gtk.DialogError.DISMISSED):
+                self.toast_overlay.add_toast(
+                    Adw.Toast(title=f"Error saving file: {e.message}")
+                )
+            file = None
+        if file is not None:
+            self.save_file(file, document, on_done)
+        elif on_done is not None:
+            on_done(False)
 
-    def save_file(self, file):
-        buffer = self.main_text_view.get_buffer()
-        start = buffer.get_start_iter()
-        end = buffer.get_end_iter()
-        text = buffer.get_text(start, end, False)
-        if not text:
+    def save_file(self, file, document=None, on_done=None):
+        """
+        Saves document, by default the selected one, to file.
+        on_done(success) is called once it is written.
+        """
+        document = document or self._document
+        buffer = document.buffer
+        if buffer.get_char_count() == 0:
+            if on_done is not None:
+                on_done(False)
             return
-        self.file_manager.save_file_async(file, text, self._on_file_saved)
+        # Edits made while the save runs mark the buffer modified again.
+        buffer.set_modified(False)
+        if buffer.get_char_count() > STREAM_SAVE_THRESHOLD:
+            # Write large buffers slice by slice instead of copying them
+            # whole; keep the document read-only so the slices stay
+            # consistent.
+            document.saving = True
+            self.main_text_view.set_editable(False)
+            self.file_manager.save_file_stream_async(
+                file, self._buffer_chunks(buffer),
+                lambda file, success, message: self._on_file_streamed(
+                    document, file, success, message, on_done),
+            )
+            return
+        text = document.get_text()
+        self.file_manager.save_file_async(
+            file, text,
+            lambda file, result: self._on_file_saved(
+                document, file, result, on_done),
+        )
 
-    def _on_file_saved(self, file, result):
+    def _buffer_chunks(self, buffer):
+        offset = 0
+        while offset < buffer.get_char_count():
+            start = buffer.get_iter_at_offset(offset)
+            end = buffer.get_iter_at_offset(offset + CHUNK_SIZE)
+            yield buffer.get_text(start, end, False)
+            offset += CHUNK_SIZE
+
+    def _on_file_streamed(self, document, file, success, message, on_done):
+        document.saving = False
+        if document is self._document:
+            self.main_text_view.set_editable(document.editable)
+        self._show_save_result(document, file, success, message, on_done)
+
+    def _on_file_saved(self, document, file, result, on_done):
         success, message = self.file_manager.save_file_finish(file, result)
+        self._show_save_result(document, file, success, message, on_done)
+
+    def _show_save_result(self, document, file, success, message, on_done):
         if success:
-            display_name = file.get_basename()
+            document.file = file
+            document.journal.reset(file.get_path())
+            document.page.set_title(document.title)
+            self._set_base_folder(document)
+            if document is self._document:
+                self.set_title(document.title)
             self.toast_overlay.add_toast(
-                Adw.Toast(title=f"Saved as {display_name}"))
+                Adw.Toast(title=f"Saved as {document.title}"))
         else:
+            document.buffer.set_modified(True)
             self.toast_overlay.add_toast(
                 Adw.Toast(title=f"Error saving file: {message}")
             )
+        if on_done is not None:
+            on_done(success)
 
     # Open file stuff (existing)
     def open_file_dialog(self, action, _):
@@ -272,30 +713,186 @@ class PresentatWindow(Adw.ApplicationWindow):
                 Adw.Toast(title=f"Error opening file: {e.message}")
             )
 
-    def open_file(self, file):
+    def open_file(self, file, location=None):
+        """
+        Opens file in a tab, or selects its tab if it is already open.
+        location is an optional (line, column) to put the cursor at.
+        """
         if self.file_manager.get_file_type(file) == Gio.FileType.DIRECTORY:
             self.toast_overlay.add_toast(
                 Adw.Toast(title="Cannot open directory as a file.")
             )
             return
-        self.file_manager.load_file_async(file, self._on_file_loaded)
+        document = self._find_document(file)
+        if document is not None:
+            self.tab_view.set_selected_page(document.page)
+            if location is not None and not document.loading:
+                self._place_cursor(document, *location)
+            return
 
-    def _on_file_loaded(self, file, result):
-        success, content = self.file_manager.load_file_finish(file, result)
+        # Reuse an untouched tab, otherwise open a new one.
+        document = self._document
+        if document is None or not document.is_blank:
+            document = self._new_document()
+
+        # Stream the file into the buffer; the document stays read-only
+        # and previews are held back until the whole file is in.
+        document.loading = True
+        document.page.set_title(file.get_basename())
+        document.page.set_loading(True)
+        if document is self._document:
+            self.main_text_view.set_editable(False)
+        document.highlighter.pause()
+        # The text in the buffer stays, undo history and all, until the
+        # first chunk arrives, and is put back if the load then fails.
+        previous = [None]
+        self.file_manager.load_file_stream_async(
+            file,
+            lambda text: self._on_file_chunk(document, text, previous),
+            lambda fraction: self._on_file_load_progress(document, fraction),
+            lambda success, message: self._on_file_loaded(
+                document, file, success, message, location, previous),
+        )
+
+    def _place_cursor(self, document, line, column):
+        buffer = document.buffer
+        _found, location = buffer.get_iter_at_line_offset(line, column)
+        buffer.place_cursor(location)
+        if document is self._document:
+            self.main_text_view.scroll_to_mark(
+                buffer.get_insert(), 0.0, True, 0.0, 0.5)
+            self.main_text_view.grab_focus()
+
+    def _on_file_chunk(self, document, text, previous):
+        buffer = document.buffer
+        if previous[0] is None:
+            previous[0] = (document.get_text(), buffer.get_modified())
+            buffer.begin_irreversible_action()
+            buffer.set_text("")
+        buffer.insert(buffer.get_end_iter(), text)
+
+    def _on_file_load_progress(self, document, fraction):
+        if fraction is not None and document is self._document:
+            self.cursor_pos.set_text(f"Loading {int(fraction * 100)}%")
+
+    def _on_file_loaded(self, document, file, success, message,
+                        location, previous):
+        buffer = document.buffer
+        started = previous[0] is not None
+        if success and not started:
+            # An empty file; nothing replaced the old text yet.
+            buffer.begin_irreversible_action()
+            buffer.set_text("")
+            started = True
+        elif started and not success:
+            text, modified = previous[0]
+            buffer.set_text(text)
+            buffer.set_modified(modified)
+        if started:
+            buffer.end_irreversible_action()
+        document.loading = False
+        document.page.set_loading(False)
         if success:
-            self._current_file = file
-            display_name = file.get_basename()
-            buffer = self.main_text_view.get_buffer()
-            buffer.set_text(content)
-            buffer.place_cursor(buffer.get_start_iter())
-            self.set_title(display_name)
+            document.file = file
+            if location is not None:
+                self._place_cursor(document, *location)
+            else:
+                buffer.place_cursor(buffer.get_start_iter())
             self.toast_overlay.add_toast(
-                Adw.Toast(title=f"Opened {display_name}"))
+                Adw.Toast(title=f"Opened {document.title}"))
+            # The buffer holds what is on disk; nothing to recover.
+            buffer.set_modified(False)
+            document.journal.reset(file.get_path())
         else:
-            self._current_file = None
+            # The buffer holds what it held before, journal and all.
             self.toast_overlay.add_toast(
-                Adw.Toast(title=f"Unable to open file: {content}")
+                Adw.Toast(title=f"Unable to open file: {message}")
             )
+        document.highlighter.rehighlight()
+        document.page.set_title(document.title)
+        document.stale = True
+        if document is not self._document:
+            # Rendered once its tab is selected.
+            return
+
+        self.main_text_view.set_editable(document.editable)
+        self.set_title(document.title)
+        # Relative image paths are served from the deck's folder by the
+        # previewer's marp://asset handler.
+        self._set_base_folder(document)
+        self.update_cursor_position(buffer, None)
+        # A freshly opened file has nothing to debounce.
+        self.debounce.render_now()
+        key = self._render_cache_key(
+            file.get_path(), document.get_text()) if success else None
+        if key is not None:
+            # Show the last render of this exact content, if any, until the
+            # fresh one arrives.
+            self.render_cache.lookup(
+                *key, lambda deck: self._on_cached_deck(document, key, deck))
+
+    def _on_cached_deck(self, document, key, deck):
+        if (deck is not None and key == self._submitted_cache_key
+                and self.conversion_scheduler.busy):
+            self._set_deck(document, deck)
+
+    # Crash recovery
+    def _find_recoverable(self):
+        recovered = recover_journals(self.journal_writer.directory)
+        if recovered:
+            GLib.idle_add(self._offer_recovery, recovered)
+
+    def _offer_recovery(self, recovered):
+        count = len(recovered)
+        dialog = Adw.AlertDialog(
+            heading="Recover Unsaved Changes?",
+            body=(
+                "Presentat did not close properly and has unsaved changes "
+                f"to {count} document{'s' if count > 1 else ''}."
+            ),
+        )
+        dialog.add_response("discard", "_Discard")
+        dialog.add_response("recover", "_Recover")
+        dialog.set_response_appearance(
+            "discard", Adw.ResponseAppearance.DESTRUCTIVE)
+        dialog.set_response_appearance(
+            "recover", Adw.ResponseAppearance.SUGGESTED)
+        dialog.set_default_response("recover")
+        dialog.set_close_response("discard")
+        dialog.connect("response", self._on_recovery_response, recovered)
+        dialog.present(self)
+        return False
+
+    def _on_recovery_response(self, dialog, response, recovered):
+        for journal_id, path, generation, text in recovered:
+            if response != "recover":
+                EditJournal(self.journal_writer, journal_id=journal_id).reset()
+                continue
+            document = self._document
+            if document is None or not document.is_blank:
+                document = self._new_document()
+            document.file = Gio.File.new_for_path(path) if path else None
+            # Keeps writing to the recovered journal, which matches the
+            # buffer once the text is in.
+            document.journal = EditJournal(
+                self.journal_writer, path, journal_id, generation)
+            document.loading = True
+            buffer = document.buffer
+            document.highlighter.pause()
+            buffer.begin_irreversible_action()
+            buffer.set_text(text)
+            buffer.end_irreversible_action()
+            document.highlighter.rehighlight()
+            buffer.place_cursor(buffer.get_start_iter())
+            document.loading = False
+            document.stale = True
+            document.page.set_title(document.title)
+            if document is self._document:
+                self.set_title(document.title)
+                self.debounce.render_now()
+        if response == "recover":
+            self.toast_overlay.add_toast(Adw.Toast(
+                title="Recovered unsaved changes. Save them to keep them."))
 
     # Open folder dialog
     def open_folder_dialog(self, action, _):
@@ -307,7 +904,11 @@ class PresentatWindow(Adw.ApplicationWindow):
             folder = dialog.select_folder_finish(result)
             if folder is not None:
                 self.current_folder = folder
+                if self._document is not None:
+                    # Decks may use images from elsewhere in the folder.
+                    self._set_base_folder(self._document)
                 self.populate_directory_tree(folder)
+                self.file_index.start(folder)
                 self.set_title(f"Text-viewer - {folder.get_basename()}")
                 self.toast_overlay.add_toast(
                     Adw.Toast(title=f"Opened folder: {folder.get_basename()}")
@@ -320,11 +921,91 @@ class PresentatWindow(Adw.ApplicationWindow):
                 Adw.Toast(title=f"Error opening folder: {e.message}")
             )
 
+    # Quick open
+    def quick_open_dialog(self, action, _):
+        if self.current_folder is None:
+            self.toast_overlay.add_toast(
+                Adw.Toast(title="Open a folder to use quick open."))
+            return
+        dialog = QuickOpenDialog(self.file_index, self.open_file)
+        dialog.present(self)
+
+    # Find in files
+    def find_in_files_dialog(self, action, _):
+        root = self.current_folder.get_path() if self.current_folder else None
+        if root is None:
+            self.toast_overlay.add_toast(
+                Adw.Toast(title="Open a folder to find in files."))
+            return
+        dialog = FindInFilesDialog(
+            root, self._open_match, self._replace_in_files)
+        dialog.present(self)
+
+    def _open_match(self, file, line, column):
+        self.open_file(file, (line, column))
+
+    def _replace_in_files(self, paths, pattern, replacement, on_done):
+        # Open documents are changed in their buffers instead, so the
+        # replacement can be undone and is not lost on their next save.
+        on_disk = []
+        in_buffers = 0
+        errors = []
+        for path in paths:
+            document = self._find_document(Gio.File.new_for_path(path))
+            if document is None:
+                on_disk.append(path)
+                continue
+            if not document.editable:
+                errors.append((path, "The file is being loaded or saved."))
+                continue
+            try:
+                replacements = [
+                    (match.start(), match.end(), replacement(match))
+                    for match in pattern.finditer(document.get_text())
+                ]
+            except (re.error, IndexError) as e:
+                errors.append((path, str(e)))
+                continue
+            if replacements:
+                self._replace_in_buffer(document.buffer, replacements)
+                in_buffers += len(replacements)
+
+        def on_replaced(files, replacements, disk_errors):
+            errors.extend(disk_errors)
+            total = replacements + in_buffers
+            message = f"Replaced {total} matches"
+            if errors:
+                message += f"; {len(errors)} files could not be changed"
+                for path, error in errors:
+                    print(f"Unable to replace in {path}: {error}")
+            self.toast_overlay.add_toast(Adw.Toast(title=message))
+            on_done(files, total, errors)
+
+        replace_in_files(
+            on_disk, pattern, replacement, self.file_manager, on_replaced)
+
+    def _replace_in_buffer(self, buffer, replacements):
+        """
+        Applies (start, end, text) replacements, given in character
+        offsets, as one undoable action. Going from the end backwards
+        keeps the offsets still to come valid, and the cursor and every
+        untouched line in place.
+        """
+        buffer.begin_user_action()
+        for start, end, text in reversed(replacements):
+            if end > start:
+                buffer.delete(buffer.get_iter_at_offset(start),
+                              buffer.get_iter_at_offset(end))
+            if text:
+                buffer.insert(buffer.get_iter_at_offset(start), text)
+        buffer.end_user_action()
+
     def populate_directory_tree(self, folder: Gio.File):
         """
         Populates the Gtk.TreeListModel with the root folder.
         The children will be populated on-demand.
         """
+        self.directory_monitors.stop_all()
         self.root_list_store.remove_all()
         root_item = FileListItem(file=folder)
         self.root_list_store.append(root_item)
@@ -0,0 +1,52 @@
+# tests/test_edit_journal.py
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    import gi
+    gi.require_version("GLib", "2.0")
+    from gi.repository import GLib
+except (ImportError, ValueError):
+    GLib = None
+
+if GLib is not None:
+    from src.core.edit_journal import JOURNAL_VERSION, recover_journals
+
+
+@unittest.skipIf(GLib is None, "needs PyGObject")
+class ReplayTest(unittest.TestCase):
+    def test_replay_on_crlf_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "deck.md")
+            with open(path, "wb") as f:
+                f.write(b"# A\r\n---\r\n# B\r\n")
+            stat = os.stat(path)
+            header = {
+                "version": JOURNAL_VERSION,
+                "generation": 0,
+                "pid": None,
+                "path": path,
+                "time": 0,
+                "base": "file",
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+            }
+            journal = os.path.join(directory, "journal")
+            os.mkdir(journal)
+            with open(os.path.join(journal, "j.json"), "w") as f:
+                json.dump(header, f)
+            # GtkTextBuffer offsets: "\r" counts as a character.
+            records = [{"d": [12, 13]}, {"i": 12, "t": "C"}, {"d": [5, 10]}]
+            with open(os.path.join(journal, "j.0.log"), "w") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+
+            recovered = recover_journals(journal)
+
+            self.assertEqual(recovered, [("j", path, 0, "# A\r\n# C\r\n")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# tests/test_file_manager.py
+import os
+import tempfile
+import time
+import unittest
+
+try:
+    import gi
+    gi.require_version("Gio", "2.0")
+    from gi.repository import Gio, GLib
+except (ImportError, ValueError):
+    Gio = GLib = None
+
+if Gio is not None:
+    from src.core.file_manager import _StreamingSave
+
+
+@unittest.skipIf(Gio is None, "needs PyGObject")
+class StreamingSaveTest(unittest.TestCase):
+    def test_failed_write_keeps_original(self):
+        class FailingSave(_StreamingSave):
+            """Fails the second write, as a full disk would."""
+            writes = 0
+
+            def _write_next(self):
+                self.writes += 1
+                if self.writes == 1:
+                    super()._write_next()
+                    return
+                cancellable = Gio.Cancellable()
+                cancellable.cancel()
+                self.stream.write_all_async(
+                    b"lost", GLib.PRIORITY_DEFAULT, cancellable,
+                    self._on_written)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "deck.md")
+            with open(path, "wb") as f:
+                f.write(b"# Original\n")
+            results = []
+            FailingSave(
+                Gio.File.new_for_path(path), ["# Partial\n", "x"],
+                lambda file, success, message: results.append(success),
+            ).start()
+
+            # The close runs on a worker thread after on_done; wait for it
+            # to drop the temporary file.
+            context = GLib.MainContext.default()
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and (
+                    not results or len(os.listdir(directory)) > 1):
+                context.iteration(False)
+                time.sleep(0.01)
+
+            self.assertEqual(results, [False])
+            self.assertEqual(os.listdir(directory), ["deck.md"])
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"# Original\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
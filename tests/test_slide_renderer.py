@@ -0,0 +1,67 @@
+# tests/test_slide_renderer.py
+import os
+import subprocess
+import sys
+import unittest
+
+from src.core.slide_renderer import split_deck, slide_start_lines
+
+STUB_MARP = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "benchmarks", "stub", "marp")
+
+
+class SplitDeckTest(unittest.TestCase):
+    def assertSlides(self, markdown, slides):
+        self.assertEqual(split_deck(markdown)[1], slides)
+
+    def test_break_after_list(self):
+        self.assertSlides("# A\n- one\n- two\n---\n# B\n",
+                          ["# A\n- one\n- two", "# B\n"])
+        for marker in ("-", "*", "+", "1.", "1)"):
+            self.assertSlides(f"{marker} item\n---\nB",
+                              [f"{marker} item", "B"])
+
+    def test_break_after_lazy_continuation(self):
+        self.assertSlides("- item\nlazy\n---\nB", ["- item\nlazy", "B"])
+        self.assertSlides("> quote\nlazy\n---\nB", ["> quote\nlazy", "B"])
+        self.assertSlides("- item\n\n  more\n---\nB",
+                          ["- item\n\n  more", "B"])
+
+    def test_break_after_other_blocks(self):
+        self.assertSlides("# A\n---\nB", ["# A", "B"])
+        self.assertSlides("> quote\n---\nB", ["> quote", "B"])
+        self.assertSlides("<!-- note -->\n---\nB", ["<!-- note -->", "B"])
+        self.assertSlides("```\ncode\n```\n---\nB", ["```\ncode\n```", "B"])
+        self.assertSlides("    code\n---\nB", ["    code", "B"])
+        self.assertSlides("Title\n===\n---\nB", ["Title\n===", "B"])
+
+    def test_setext_underline(self):
+        self.assertSlides("Title\n---\nbody", ["Title\n---\nbody"])
+        self.assertSlides("one\ntwo\n---\nbody", ["one\ntwo\n---\nbody"])
+        # "2." cannot interrupt a paragraph, so it continues it.
+        self.assertSlides("text\n2. more\n---\nB", ["text\n2. more\n---\nB"])
+
+    def test_separator_in_fence(self):
+        self.assertSlides("```\n---\n```\n\n---\nB", ["```\n---\n```\n", "B"])
+
+
+class SlideStartLinesTest(unittest.TestCase):
+    def test_start_lines(self):
+        markdown = "---\ntheme: a\n---\n# A\n- one\n---\n# B\n\n---\n\n# C\n"
+        self.assertEqual(slide_start_lines(markdown), [3, 6, 9])
+
+    def test_matches_rendered_slides(self):
+        markdown = (
+            "# A\n- one\n---\n# B\n\n---\n\n# C\n1. x\n---\n> q\n---\nD\n")
+        html = subprocess.run(
+            [sys.executable, STUB_MARP, "-"], input=markdown,
+            capture_output=True, text=True, check=True).stdout
+        rendered = html.count("<section")
+        self.assertEqual(rendered, 5)
+        self.assertEqual(len(slide_start_lines(markdown)), rendered)
+        self.assertEqual(len(split_deck(markdown)[1]), rendered)
+
+
+if __name__ == "__main__":
+    unittest.main()
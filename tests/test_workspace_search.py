@@ -0,0 +1,30 @@
+# tests/test_workspace_search.py
+import unittest
+
+try:
+    import gi
+    gi.require_version("Gio", "2.0")
+    from gi.repository import Gio
+except (ImportError, ValueError):
+    Gio = None
+
+if Gio is not None:
+    from src.core.workspace_search import compile_query, compile_replacement
+
+
+@unittest.skipIf(Gio is None, "needs PyGObject")
+class ReplacementTest(unittest.TestCase):
+    def test_literal_replacement_is_inserted_as_typed(self):
+        pattern = compile_query("path")
+        for text in (r"C:\temp", r"\d", r"\1", r"\g<0>"):
+            replacement = compile_replacement(text)
+            self.assertEqual(pattern.sub(replacement, "a path"), "a " + text)
+
+    def test_regex_replacement_is_expanded(self):
+        pattern = compile_query(r"(\w+)@(\w+)", regex=True)
+        replacement = compile_replacement(r"\2 at \1", regex=True)
+        self.assertEqual(pattern.sub(replacement, "me@home"), "home at me")
+
+
+if __name__ == "__main__":
+    unittest.main()